@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from squid_metrics import events, fetch, metrics, queries, rollup, scheduler, store
+
+from . import standin, synthetic
+
+# --- Peak RSS ---------------------------------------------------------------------------------------------------------
+# ru_maxrss only ever grows, so each loader's peak is sampled from /proc while it runs (process-wide peak elsewhere).
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE / 2**20
+    except OSError:
+        return fetch._peak_rss_mb()
+
+
+class PeakRSS:
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, _rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = _rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, _rss_mb())
+
+
+# --- Router Matching Baseline -----------------------------------------------------------------------------------------
+# The leading-wildcard ILIKE filter queries used before the router registry, kept to measure the registry against. It
+# cannot use activation dates, so it scans from the requested start.
+class IlikeRouters(queries.RouterRegistry):
+    first_active = None
+
+    def predicate(self, column):
+        return "\n          OR ".join(f"{column} ILIKE '%{address}%'" for address in self.routers)
+
+
+# --- Loader Measurements ----------------------------------------------------------------------------------------------
+def _rows(result):
+    if isinstance(result, tuple):
+        return sum(_rows(part) for part in result)
+    return len(result) if hasattr(result, "__len__") else 1
+
+
+def measure(results, scale, name, database, fn, *args, rows_in=None):
+    # rows scanned: warehouse rows read by stand-in SQL, or local table rows a loader reduces over
+    scanned_before = database.rows_scanned
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        value = fn(*args)
+        wall = time.perf_counter() - started
+    scanned = database.rows_scanned - scanned_before
+    results.append({
+        "scale": scale,
+        "loader": name,
+        "wall_seconds": round(wall, 4),
+        "peak_rss_mb": round(rss.peak_mb, 1),
+        "rows_scanned": int(scanned if scanned else (rows_in or 0)),
+        "rows_out": _rows(value),
+    })
+    print(f"  {name:<28} {wall:9.3f}s  {rss.peak_mb:9.1f} MiB  {results[-1]['rows_scanned']:>13,} scanned")
+    return value
+
+
+def run_scale(scale, rows, data_dir, start_date, end_date, threads=None):
+    results = []
+    generated = synthetic.generate(Path(data_dir) / scale, rows, threads)
+    print(f"{scale}: {rows:,} fact rows" + (f" (generated in {generated:.1f}s)" if generated else ""))
+    database = standin.StandInDatabase(Path(data_dir) / scale, threads)
+    query_scheduler = scheduler.QueryScheduler(max_workers=4)
+    store_dir = tempfile.mkdtemp(prefix="squid-bench-store-")
+    try:
+        load = lambda since, until, routers=synthetic.ROUTERS: events.load_events_concurrently(
+            database, query_scheduler, since, until, routers=routers)
+        month_end = pd.Timestamp(end_date)
+        ilike = IlikeRouters(synthetic.ROUTER_DEPLOYMENTS)
+        measure(results, scale, "extract:history:ilike", database, load, synthetic.START, end_date, ilike)
+        measure(results, scale, "extract:history", database, load, synthetic.START, end_date)
+        measure(results, scale, "extract:last_month", database, load, month_end - pd.Timedelta(days=30), month_end)
+        measure(results, scale, "extract:window", database, load, start_date, end_date)
+
+        event_store = store.EventStore(store_dir, history_start=synthetic.START)
+        measure(results, scale, "store:initial_sync", database, event_store.sync, load, end_date)
+        measure(results, scale, "store:incremental_sync", database, event_store.sync, load, end_date)
+
+        cube = measure(results, scale, "store:read_rollup", database, event_store.read_rollup)
+        counter = measure(results, scale, "store:read_user_sketches", database, event_store.user_counter)
+        registry = measure(results, scale, "store:read_user_registry", database, event_store.user_registry)
+        user_days = measure(results, scale, "store:read_user_days", database, event_store.read_user_days)
+
+        cube = rollup.window(cube, start_date, end_date)
+        users = counter.window(start_date, end_date)
+        cells = len(users.table)
+        measure(results, scale, "kpis", database, metrics.kpis, cube, users, rows_in=len(cube) + cells)
+        for timeframe in ("month", "week", "day"):
+            measure(results, scale, f"time_series:{timeframe}", database, metrics.time_series, cube, users, timeframe, rows_in=len(cube) + cells)
+        measure(results, scale, "source_chains", database, metrics.by_source_chain, cube, users, rows_in=len(cube) + cells)
+        measure(results, scale, "destination_chains", database, metrics.by_destination_chain, cube, users, rows_in=len(cube) + cells)
+        measure(results, scale, "top_paths", database, metrics.top_paths, cube, users, rows_in=len(cube) + cells)
+
+        def new_users(timeframe):
+            daily = metrics.daily_new_users(registry["first_seen"], start_date, end_date)
+            return metrics.new_users(daily, timeframe, metrics.active_users(users, timeframe))
+        measure(results, scale, "new_users:month", database, new_users, "month", rows_in=len(registry) + cells)
+
+        def user_distributions():
+            per_user = metrics.per_user(rollup.window(user_days, start_date, end_date))
+            return metrics.user_distribution_by_volume(per_user), metrics.user_distribution_by_active_days(per_user)
+        measure(results, scale, "user_distributions", database, user_distributions, rows_in=len(user_days))
+    finally:
+        query_scheduler.shutdown()
+        database.close()
+        shutil.rmtree(store_dir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every dashboard loader against synthetic fact tables.")
+    parser.add_argument("--scale", action="append", choices=list(synthetic.SCALES), help="repeatable; default 1m")
+    parser.add_argument("--data-dir", default=".squid_bench", help="where generated fact tables are kept")
+    parser.add_argument("--start-date", default="2023-01-01")
+    parser.add_argument("--end-date", default="2025-08-31")
+    parser.add_argument("--threads", type=int, help="DuckDB threads (default: all cores)")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for scale in args.scale or ["1m"]:
+        results += run_scale(scale, synthetic.SCALES[scale], args.data_dir, args.start_date, args.end_date, args.threads)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import itertools
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- Snowflake -> DuckDB Translation ----------------------------------------------------------------------------------
+# Covers exactly the Snowflake dialect squid_metrics.queries emits: VARIANT paths (data:a:b.c, optionally ::STRING),
+# IS_ARRAY / IS_OBJECT, TRY_TO_DOUBLE and TO_TIMESTAMP_NTZ over numeric binds. The synthetic `data` column is JSON text.
+_PATH = r"data:([A-Za-z_]\w*(?:[.:][A-Za-z_]\w*)*)"
+
+
+def _json_path(path):
+    return "$." + path.replace(":", ".")
+
+
+def translate(query):
+    query = re.sub(rf"IS_(ARRAY|OBJECT)\({_PATH}\)", lambda m: f"(json_type(data, '{_json_path(m[2])}') = '{m[1]}')", query)
+    query = re.sub(rf"{_PATH}(?:::STRING)?", lambda m: f"json_extract_string(data, '{_json_path(m[1])}')", query)
+    query = re.sub(r"TRY_TO_DOUBLE\((json_extract_string\(data, '[^']*'\))\)", r"TRY_CAST(\1 AS DOUBLE)", query)
+    return re.sub(r"TO_TIMESTAMP_NTZ\(:(\d+)\)", r"CAST($\1 AS TIMESTAMP)", query)
+
+
+# --- Stand-in Connections ---------------------------------------------------------------------------------------------
+# Just enough of the Snowflake connector surface for squid_metrics.fetch (cursor, execute, execute_async, sfqid,
+# get_results_from_sfqid, abort_query, fetch_arrow_batches) and of ConnectionPool (connection()) for the loaders to
+# run unchanged against local Parquet fact tables.
+_query_ids = itertools.count(1)
+
+
+class StandInCursor:
+    def __init__(self, database):
+        self._database = database
+        self._cursor = database.db.cursor()
+        self._table = None
+        self.sfqid = None
+        self.rows_scanned = 0
+
+    def execute(self, query, params=None):
+        self.sfqid = f"standin-{next(_query_ids)}"
+        self._table = self._cursor.execute(translate(query), params or []).fetch_arrow_table()
+        self.rows_scanned = self._database.rows_in_range(query, params)
+        self._database.record(self.rows_scanned)
+        return self
+
+    # DuckDB runs the statement inside execute_async, so by the time a query id is known there is nothing to abort
+    def execute_async(self, query, params=None):
+        return self.execute(query, params)
+
+    def get_results_from_sfqid(self, query_id):
+        pass
+
+    def abort_query(self, query_id):
+        return False
+
+    def fetch_arrow_batches(self):
+        # like the connector, an empty result yields no batches
+        for batch in self._table.to_batches(max_chunksize=1_000_000):
+            yield pa.Table.from_batches([batch])
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    def __init__(self, database):
+        self._database = database
+
+    def cursor(self):
+        return StandInCursor(self._database)
+
+    def is_closed(self):
+        return False
+
+    def close(self):
+        pass
+
+
+def _row_groups(path):
+    # (min created_at, max created_at, rows) per Parquet row group
+    metadata = pq.ParquetFile(path).metadata
+    column = metadata.schema.to_arrow_schema().get_field_index("created_at")
+    groups = []
+    for index in range(metadata.num_row_groups):
+        group = metadata.row_group(index)
+        stats = group.column(column).statistics
+        groups.append((pd.Timestamp(stats.min), pd.Timestamp(stats.max), group.num_rows))
+    return groups
+
+
+# Rows scanned are modelled the way Snowflake prunes micro-partitions: every row of each referenced table's row
+# groups whose created_at range overlaps the bound [:1, :2) window (DuckDB's profiler counts whole Parquet files).
+class StandInDatabase:
+    TABLES = ("fact_transfers", "fact_gmp")
+
+    def __init__(self, data_dir, threads=None):
+        data_dir = Path(data_dir)
+        self.db = duckdb.connect()
+        if threads:
+            self.db.execute(f"SET threads = {int(threads)}")
+        self.db.execute("ATTACH ':memory:' AS axelar")
+        self.db.execute("CREATE SCHEMA axelar.axelscan")
+        self._row_groups = {}
+        for table in self.TABLES:
+            path = data_dir / f"{table}.parquet"
+            self.db.execute(f"CREATE VIEW axelar.axelscan.{table} AS SELECT * FROM read_parquet('{path}')")
+            self._row_groups[table] = _row_groups(path)
+        self._lock = threading.Lock()
+        self.rows_scanned = 0
+        self.queries = 0
+
+    def rows_in_range(self, query, params):
+        start, end = (pd.Timestamp(value) for value in params[:2]) if params else (pd.Timestamp.min, pd.Timestamp.max)
+        return sum(
+            rows
+            for table, groups in self._row_groups.items() if f"axelscan.{table}" in query
+            for low, high, rows in groups if high >= start and low < end
+        )
+
+    def record(self, rows_scanned):
+        with self._lock:
+            self.rows_scanned += rows_scanned
+            self.queries += 1
+
+    @contextmanager
+    def connection(self):
+        yield StandInConnection(self)
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,131 @@
+import time
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+from squid_metrics import queries
+
+# --- Synthetic Fact Tables --------------------------------------------------------------------------------------------
+# fact_transfers and fact_gmp shaped like axelar.axelscan, with the VARIANT `data` payload stored as JSON text. Rows
+# are laid out in created_at order like the clustered warehouse tables, so Parquet row-group statistics prune date
+# ranges the way micro-partitions do. Every random draw hashes the row number, so output is identical across runs
+# and thread counts.
+SCALES = {"1m": 1_000_000, "10m": 10_000_000, "100m": 100_000_000}
+
+START, END = "2022-01-01", "2025-09-01"
+CHAINS = [
+    "ethereum", "arbitrum", "base", "polygon", "binance", "avalanche", "optimism", "moonbeam", "fantom", "celo",
+    "linea", "mantle", "scroll", "blast", "kava", "filecoin", "osmosis", "cosmoshub", "injective", "sei",
+]
+ASSETS = ["USDC", "axlUSDC", "ETH", "WETH", "USDT", "WBTC", "AXL", "DAI"]
+GMP_SHARE = 0.6
+SQUID_SHARE = 0.7
+USERS_PER_ROW = 0.05
+
+# router deployments staggered over the timeline, stored in their mixed-case checksum form; Squid rows only go through
+# routers already deployed at their created_at, so nothing matches before the first deployment
+ROUTER_DEPLOYMENTS = list(zip(queries.ROUTER_ADDRESSES, ["2022-07-01", "2023-01-15", "2023-09-01", "2024-04-01", "2025-01-15"]))
+ROUTERS = queries.RouterRegistry(ROUTER_DEPLOYMENTS, version="synthetic")
+
+
+def _sql_list(values):
+    return "[" + ", ".join(f"'{value}'" for value in values) + "]"
+
+
+def _pick(values, salt, skew=2):
+    # lower list positions are drawn more often, roughly like real chain and asset popularity
+    return f"list_element({_sql_list(values)}, 1 + floor(pow(rnd(i, {salt}), {skew}) * {len(values)})::INTEGER)"
+
+
+def _router(created_at):
+    addresses = [address for address, _ in ROUTER_DEPLOYMENTS]
+    deployed = "[" + ", ".join(f"TIMESTAMP '{day}'" for _, day in ROUTER_DEPLOYMENTS) + "]"
+    active = f"len(list_filter({deployed}, day -> day <= {created_at}))"
+    return f"""CASE WHEN rnd(i, 4) < {SQUID_SHARE} AND {active} > 0
+          THEN list_element({_sql_list(addresses)}, 1 + floor(rnd(i, 5) * {active})::INTEGER)
+          ELSE printf('0x%040x', hash(i, 6))
+        END"""
+
+
+def _common(rows, users):
+    step_us = (pd.Timestamp(END) - pd.Timestamp(START)) / pd.Timedelta(microseconds=1) / rows
+    created_at = f"TIMESTAMP '{START}' + to_microseconds(CAST(i * {step_us!r} AS BIGINT))"
+    return f"""
+        {created_at} AS created_at,
+        CASE WHEN rnd(i, 1) < 0.97 THEN 'executed' ELSE 'error' END AS status,
+        CASE WHEN rnd(i, 2) < 0.98 THEN 'received' ELSE 'pending' END AS simplified_status,
+        printf('0x%040x', floor(pow(rnd(i, 3), 3) * {users})::BIGINT) AS user_address,
+        {_router(created_at)} AS router,
+        {_pick(CHAINS, 7)} AS source_chain,
+        {_pick(CHAINS, 8)} AS destination_chain,
+        {_pick(ASSETS, 9)} AS asset,
+        round(exp(rnd(i, 10) * 12), 2) AS amount,
+        rnd(i, 11) < 0.005 AS malformed"""
+
+
+def _transfers_sql(rows, users, path):
+    return f"""
+    COPY (
+      WITH base AS (SELECT {_common(rows, users)}, i FROM range({rows}) t(i))
+      SELECT
+        created_at, status, simplified_status,
+        router AS sender_address,
+        user_address AS recipient_address,
+        'transfer-' || i AS id,
+        json_object(
+          'send', json_object(
+            'original_source_chain', upper(source_chain),
+            'original_destination_chain', destination_chain,
+            'amount', CASE WHEN malformed THEN json('[1, 2]') ELSE to_json(amount) END,
+            'fee_value', to_json(round(amount * 0.001, 6))
+          ),
+          'link', json_object('price', to_json(round(0.5 + rnd(i, 12), 4)), 'asset', asset)
+        )::VARCHAR AS data
+      FROM base
+    ) TO '{path}' (FORMAT parquet, ROW_GROUP_SIZE 250000)
+    """
+
+
+def _gmp_sql(rows, users, path):
+    return f"""
+    COPY (
+      WITH base AS (SELECT {_common(rows, users)}, i FROM range({rows}) t(i))
+      SELECT
+        created_at, status, simplified_status,
+        'gmp-' || i AS id,
+        json_object(
+          'call', json_object(
+            'chain', source_chain,
+            'returnValues', json_object('destinationChain', destination_chain),
+            'transaction', json_object('from', user_address)
+          ),
+          'value', CASE WHEN malformed THEN json('{{"v": 1}}') ELSE to_json(amount) END,
+          'gas', json_object('gas_used_amount', to_json(round(rnd(i, 13) * 0.01, 6))),
+          'gas_price_rate', json_object('source_token', json_object('token_price', json_object('usd', to_json(round(1 + rnd(i, 14) * 3000, 2))))),
+          'fees', json_object('express_fee_usd', CASE WHEN rnd(i, 15) < 0.3 THEN to_json(round(rnd(i, 16) * 5, 4)) END),
+          'approved', json_object('returnValues', json_object('contractAddress', router)),
+          'symbol', asset
+        )::VARCHAR AS data
+      FROM base
+    ) TO '{path}' (FORMAT parquet, ROW_GROUP_SIZE 250000)
+    """
+
+
+def generate(out_dir, rows, threads=None):
+    # returns generation seconds, or 0.0 when both tables already exist
+    out_dir = Path(out_dir)
+    transfers, gmp = out_dir / "fact_transfers.parquet", out_dir / "fact_gmp.parquet"
+    if transfers.exists() and gmp.exists():
+        return 0.0
+    out_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    with duckdb.connect() as db:
+        if threads:
+            db.execute(f"SET threads = {int(threads)}")
+        db.execute("CREATE MACRO rnd(i, salt) AS (hash(i, salt) % 1000000) / 1000000.0")
+        gmp_rows = int(rows * GMP_SHARE)
+        users = max(1, int(rows * USERS_PER_ROW))
+        db.execute(_transfers_sql(rows - gmp_rows, users, transfers))
+        db.execute(_gmp_sql(gmp_rows, users, gmp))
+    return time.perf_counter() - started
@@ -0,0 +1,218 @@
+import abc
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .singleflight import SingleFlight
+
+# bump when a loader's output shape or values change so old entries are never served
+CACHE_VERSION = 4
+
+# seconds each metric family stays fresh; keys also carry the store data version, so new data never serves stale
+# results and TTLs only bound how long superseded entries linger
+DEFAULT_TTLS = {
+    "kpis": 6 * 3600,
+    "time_series": 6 * 3600,
+    "source_chains": 6 * 3600,
+    "destination_chains": 6 * 3600,
+    "paths": 6 * 3600,
+    "new_users": 24 * 3600,
+    "user_distributions": 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+
+def _normalize(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def _encode(value):
+    # section results are a DataFrame or a tuple of DataFrames
+    frames = list(value) if isinstance(value, tuple) else [value]
+    return isinstance(value, tuple), [pa.Table.from_pandas(frame) for frame in frames]
+
+
+def _decode(is_tuple, tables):
+    frames = [table.to_pandas() for table in tables]
+    return tuple(frames) if is_tuple else frames[0]
+
+
+# --- Result Cache -----------------------------------------------------------------------------------------------------
+# Section results keyed by metric family plus exactly the parameters that family's loader reads. Backends implement
+# _get/_put; a network backend (e.g. Redis or memcached holding the same Parquet payloads) plugs in via BACKENDS.
+class ResultCache(abc.ABC):
+    def __init__(self, ttls=None):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+        self._flights = SingleFlight()
+
+    def _record(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    @staticmethod
+    def key(family, params):
+        payload = json.dumps({"v": CACHE_VERSION, "family": family, "params": _normalize(params)}, sort_keys=True, default=str)
+        return f"{family}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]}"
+
+    def ttl(self, family):
+        return self.ttls.get(family, DEFAULT_TTL)
+
+    def get_or_compute(self, family, params, compute, stats=None, refresh=False):
+        # refresh recomputes and rewrites the entry even when it is still fresh, restarting its TTL
+        key = self.key(family, params)
+        value = None if refresh else self._get(key)
+        stats = stats if stats is not None else {}
+        stats.update(cache="hit" if value is not None else "refresh" if refresh else "miss", cache_backend=type(self).__name__)
+        if value is not None:
+            self._record(hits=1)
+            return value
+        # sessions missing the same key at once wait on one computation instead of each running it
+        value, shared = self._flights.do(key, lambda: self._compute(key, family, compute))
+        if shared:
+            stats["cache"] = "coalesced"
+        self._record(**({"coalesced": 1} if shared else {"misses": 1}))
+        return value
+
+    def _compute(self, key, family, compute):
+        value = compute()
+        self._put(key, family, value, self.ttl(family))
+        return value
+
+    @abc.abstractmethod
+    def _get(self, key):
+        # the cached value, or None when missing or expired
+        ...
+
+    @abc.abstractmethod
+    def _put(self, key, family, value, ttl):
+        ...
+
+
+# --- Local Backend ----------------------------------------------------------------------------------------------------
+# Parquet payloads under <root>/values with a SQLite index (WAL mode) beside them, so every server process on the
+# host and every restart share warm results. Once the payloads exceed max_bytes, expired entries go first and then
+# the least recently read ones.
+class LocalResultCache(ResultCache):
+    def __init__(self, root, max_bytes=512 * 2**20, ttls=None):
+        super().__init__(ttls)
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        (self.root / "values").mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    family TEXT NOT NULL,
+                    parts INTEGER NOT NULL,
+                    is_tuple INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.root / "index.sqlite", timeout=30)
+
+    def _value_path(self, key, part):
+        return self.root / "values" / f"{key}-{part}.parquet"
+
+    def _remove_files(self, key, parts):
+        for part in range(parts):
+            self._value_path(key, part).unlink(missing_ok=True)
+
+    def _get(self, key):
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            row = db.execute("SELECT parts, is_tuple, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            parts, is_tuple, expires_at = row
+            if expires_at <= now:
+                db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._remove_files(key, parts)
+                return None
+            db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        try:
+            tables = [pq.read_table(self._value_path(key, part)) for part in range(parts)]
+        except FileNotFoundError:
+            # evicted by another process between the index read and the file read
+            return None
+        return _decode(bool(is_tuple), tables)
+
+    def _put(self, key, family, value, ttl):
+        is_tuple, tables = _encode(value)
+        size = 0
+        for part, table in enumerate(tables):
+            path = self._value_path(key, part)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            pq.write_table(table, tmp)
+            os.replace(tmp, path)
+            size += path.stat().st_size
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, family, len(tables), int(is_tuple), size, now, now + ttl, now),
+            )
+        self.evict()
+
+    def evict(self):
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            rows = db.execute(
+                "SELECT key, parts, bytes, expires_at FROM results ORDER BY expires_at > ?, accessed_at", (now,)
+            ).fetchall()
+            total = sum(row[2] for row in rows)
+            evicted = []
+            for key, parts, size, expires_at in rows:
+                if expires_at > now and total <= self.max_bytes:
+                    break
+                evicted.append((key, parts))
+                total -= size
+            db.executemany("DELETE FROM results WHERE key = ?", [(key,) for key, _ in evicted])
+        for key, parts in evicted:
+            self._remove_files(key, parts)
+        self._record(evictions=len(evicted))
+
+    def size(self):
+        with closing(self._connect()) as db:
+            return db.execute("SELECT COALESCE(SUM(bytes), 0) FROM results").fetchone()[0]
+
+
+BACKENDS = {"local": LocalResultCache}
+
+
+def open_result_cache(settings):
+    settings = dict(settings)
+    backend = settings.pop("backend", "local")
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown result cache backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    ttls = {family: minutes * 60 for family, minutes in settings.pop("ttl_minutes", {}).items()}
+    if backend == "local":
+        settings.setdefault("root", ".squid_store/results")
+        if "max_megabytes" in settings:
+            settings["max_bytes"] = settings.pop("max_megabytes") * 2**20
+    return BACKENDS[backend](ttls=ttls, **settings)
@@ -0,0 +1,80 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class QueryCancelled(RuntimeError):
+    pass
+
+
+# --- Query Groups -----------------------------------------------------------------------------------------------------
+# Everything one dashboard run started: warehouse queries by Snowflake query id and the loader futures it queued.
+# Cancelling a group aborts its running queries server-side, drops its queued loaders and fails any query it would
+# start afterwards with QueryCancelled.
+class QueryGroup:
+    def __init__(self, owner=None):
+        self.owner = owner
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._queries = {}
+        self._futures = []
+
+    def check(self):
+        if self.cancelled:
+            raise QueryCancelled(f"superseded run of {self.owner}")
+
+    @contextmanager
+    def track(self, cursor, query_id):
+        with self._lock:
+            self.check()
+            self._queries[query_id] = (cursor, time.monotonic())
+        try:
+            yield
+        except Exception as error:
+            # an aborted query surfaces as a connector error; report it as the cancellation it was
+            if self.cancelled:
+                raise QueryCancelled(f"query {query_id} cancelled") from error
+            raise
+        finally:
+            with self._lock:
+                self._queries.pop(query_id, None)
+
+    def add_future(self, future):
+        with self._lock:
+            self._futures.append(future)
+
+    def cancel(self):
+        # returns (queries aborted, seconds they had been running, queued loaders dropped)
+        with self._lock:
+            self.cancelled = True
+            running, self._queries = self._queries, {}
+            futures, self._futures = self._futures, []
+        now = time.monotonic()
+        seconds = 0.0
+        for query_id, (cursor, started) in running.items():
+            cursor.abort_query(query_id)
+            seconds += now - started
+        dropped = sum(future.cancel() for future in futures)
+        return len(running), seconds, dropped
+
+
+# --- Cancellation Stats -----------------------------------------------------------------------------------------------
+# Process-wide totals of what superseded runs gave back.
+class CancellationStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"superseded_runs": 0, "cancelled_queries": 0, "cancelled_seconds": 0.0, "dropped_loaders": 0}
+
+    def cancel(self, group):
+        queries, seconds, dropped = group.cancel()
+        if queries or dropped:
+            with self._lock:
+                self._stats["superseded_runs"] += 1
+                self._stats["cancelled_queries"] += queries
+                self._stats["cancelled_seconds"] += seconds
+                self._stats["dropped_loaders"] += dropped
+        return queries, seconds, dropped
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,88 @@
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from . import cancellation, connection, fetch, queries
+from .scheduler import HIGH
+
+# --- Normalized Event Schema ------------------------------------------------------------------------------------------
+EVENT_COLUMNS = [
+    "created_at",
+    "source_chain",
+    "destination_chain",
+    "user",
+    "amount_usd",
+    "fee",
+    "id",
+    "service",
+    "asset",
+]
+
+# low-cardinality columns kept as categoricals in memory
+EVENT_CATEGORIES = ["source_chain", "destination_chain", "service", "asset"]
+
+
+# --- Normalization ----------------------------------------------------------------------------------------------------
+def normalize_events(df):
+    df = df.rename(columns=str.lower).reindex(columns=EVENT_COLUMNS)
+    created_at = pd.to_datetime(df["created_at"])
+    if created_at.dt.tz is not None:
+        created_at = created_at.dt.tz_convert("UTC").dt.tz_localize(None)
+    df["created_at"] = created_at
+    df["amount_usd"] = pd.to_numeric(df["amount_usd"], errors="coerce")
+    df["fee"] = pd.to_numeric(df["fee"], errors="coerce")
+    return df
+
+
+def _lowercase_columns(table):
+    # Snowflake returns unquoted aliases upper-cased
+    return table.rename_columns([name.lower() for name in table.column_names])
+
+
+def _read_branch(pool, query, params, stats, flights=None, group=None):
+    def read_once():
+        requested = time.perf_counter()
+        with pool.connection() as conn:
+            # time to check out a pooled connection, including any reconnect
+            stats["pool_wait_seconds"] = round(time.perf_counter() - requested, 4)
+            return _lowercase_columns(fetch.fetch_arrow(conn, query, params, stats=stats, group=group))
+
+    def read():
+        try:
+            return read_once()
+        except Exception as error:
+            if not connection.is_session_expired(error):
+                raise
+            # the pool has already replaced the expired connection; the statement runs once more on a fresh one
+            stats["session_retries"] = 1
+            return read_once()
+    if flights is None:
+        return read()
+    # identical in-flight reads from other sessions share one warehouse execution; Arrow tables are immutable
+    while True:
+        try:
+            table, stats["coalesced"] = flights.do(queries.query_key(query, params), read)
+            return table
+        except cancellation.QueryCancelled:
+            # the run leading this read was superseded; unless this one was too, read it again
+            if group is not None and group.cancelled:
+                raise
+
+
+def load_events_concurrently(pool, scheduler, start_date, end_date, stats=None, flights=None, group=None,
+                             routers=queries.DEFAULT_ROUTERS):
+    # the Token Transfers and GMP branches run side by side on separate pooled connections, ahead of section loaders
+    batch = scheduler.batch()
+    params = queries.date_params(start_date, end_date, routers)
+    branch_stats = {}
+    for branch in queries.BRANCHES:
+        branch_stats[branch] = {}
+        query = queries.build_branch_query(branch, EVENT_COLUMNS, routers)
+        batch.submit(branch, _read_branch, pool, query, params, branch_stats[branch], flights, group, priority=HIGH)
+    tables = [table for table in batch.results().values() if table.num_columns]
+    table = pa.concat_tables(tables, promote_options="permissive") if tables else pa.table({})
+    df = normalize_events(fetch.to_frame(table, EVENT_CATEGORIES, stats))
+    if stats is not None:
+        stats["branches"] = branch_stats
+    return df
@@ -0,0 +1,79 @@
+import logging
+import resource
+import sys
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _record(stats, **values):
+    if stats is not None:
+        stats.update(values)
+
+
+# --- Arrow Fetch ------------------------------------------------------------------------------------------------------
+def _execute(cursor, query, params, group):
+    if group is None:
+        cursor.execute(query, params)
+        return
+    # submitted asynchronously so the query id is known, and abortable, while the warehouse is still running it
+    group.check()
+    cursor.execute_async(query, params)
+    with group.track(cursor, cursor.sfqid):
+        cursor.get_results_from_sfqid(cursor.sfqid)
+
+
+def iter_arrow_batches(conn, query, params=None, stats=None, group=None):
+    # streams the result set batch by batch straight from the connector's Arrow result chunks; queries run inside a
+    # cancellation.QueryGroup when one is given
+    cursor = conn.cursor()
+    started = time.perf_counter()
+    try:
+        _execute(cursor, query, params, group)
+        _record(stats, query_id=cursor.sfqid, execute_seconds=time.perf_counter() - started)
+        rows = 0
+        for batch in cursor.fetch_arrow_batches():
+            rows += batch.num_rows
+            yield batch
+        _record(stats, rows=rows, fetch_seconds=time.perf_counter() - started)
+    finally:
+        cursor.close()
+
+
+def fetch_arrow(conn, query, params=None, stats=None, group=None):
+    batches = list(iter_arrow_batches(conn, query, params, stats, group))
+    if not batches:
+        return pa.table({})
+    return pa.concat_tables(batches, promote_options="permissive")
+
+
+# --- Compact Conversion -----------------------------------------------------------------------------------------------
+def to_frame(table, categories=(), stats=None):
+    # low-cardinality string columns become pandas categoricals via Arrow dictionary encoding; the table's
+    # buffers are released column by column during conversion to keep peak memory near one copy
+    started = time.perf_counter()
+    arrow_bytes = table.nbytes
+    for name in categories:
+        if name in table.column_names:
+            index = table.schema.get_field_index(name)
+            table = table.set_column(index, name, pc.dictionary_encode(table.column(name)))
+    table = table.unify_dictionaries()
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
+    convert_seconds = time.perf_counter() - started
+    frame_bytes = int(df.memory_usage(deep=True).sum())
+    _record(stats, convert_seconds=convert_seconds, arrow_bytes=arrow_bytes, frame_bytes=frame_bytes, peak_rss_mb=_peak_rss_mb())
+    logger.info(
+        "converted %d rows: %.3fs, arrow %.1f MiB -> frame %.1f MiB, peak RSS %.0f MiB",
+        len(df), convert_seconds, arrow_bytes / 2**20, frame_bytes / 2**20, _peak_rss_mb(),
+    )
+    return df
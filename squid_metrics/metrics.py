@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from . import rollup
+
+# --- User Distribution Buckets ----------------------------------------------------------------------------------------
+VOLUME_BUCKET_EDGES = [100, 1_000, 10_000, 100_000, 1_000_000]
+ACTIVE_DAYS_BUCKET_EDGES = [1, 5, 10, 25, 50]
+
+
+def _short_amount(value):
+    for size, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "k")):
+        if value >= size:
+            return f"{value / size:g}{suffix}"
+    return f"{value:g}"
+
+
+def volume_bucket_labels(edges):
+    # buckets are right-closed: (-inf, e0], (e0, e1], ..., (e_last, inf)
+    labels = [f"below {_short_amount(edges[0])}$"]
+    labels += [f"{_short_amount(lo)}-{_short_amount(hi)}$" for lo, hi in zip(edges, edges[1:])]
+    labels.append(f"{_short_amount(edges[-1])}+$")
+    return [f"{chr(ord('a') + i)}/ {label}" for i, label in enumerate(labels)]
+
+
+def _days(first, last):
+    if first == last:
+        return f"{first} Day" if first == 1 else f"{first} Days"
+    return f"{first}-{last} Days"
+
+
+def active_days_bucket_labels(edges):
+    edges = [int(edge) for edge in edges]
+    labels = [_days(1, edges[0])]
+    labels += [_days(lo + 1, hi) for lo, hi in zip(edges, edges[1:])]
+    labels.append(f"{edges[-1] + 1}+ Days")
+    return [f"{chr(ord('a') + i)}/ {label}" for i, label in enumerate(labels)]
+
+
+# --- Helpers ----------------------------------------------------------------------------------------------------------
+def truncate_dates(created_at, timeframe):
+    # Mirrors Snowflake DATE_TRUNC: weeks start on Monday
+    if timeframe == "month":
+        return created_at.dt.to_period("M").dt.start_time
+    if timeframe == "week":
+        return created_at.dt.to_period("W-SUN").dt.start_time
+    return created_at.dt.floor("D")
+
+
+def _dates(df):
+    return df["day"] if "day" in df.columns else df["created_at"]
+
+
+def _path(df):
+    return df["source_chain"].str.cat(df["destination_chain"], sep="➡").rename("PATH")
+
+
+def _summarize(cube, users, key):
+    # transfers and volume re-aggregate from the rollup cube; distinct users merge per-cell sketches
+    df = rollup.aggregate(cube, key(cube)).join(users.count(key), how="left")
+    df["transfers"] = df["transfers"].astype("int32")
+    df["users"] = df["users"].fillna(0).astype("int32")
+    return df
+
+
+def _bucket_counts(values, edges, labels, label_column):
+    buckets = np.digitize(values, edges, right=True)
+    counts = np.bincount(buckets, minlength=len(labels)).astype("int32")
+    df = pd.DataFrame({label_column: labels, "Number of Users": counts})
+    return df[df["Number of Users"] > 0].sort_values("Number of Users", ascending=False, kind="stable", ignore_index=True)
+
+
+# --- KPIs -------------------------------------------------------------------------------------------------------------
+def kpis(cube, users):
+    return pd.DataFrame({
+        "NUMBER_OF_TRANSFERS": [int(cube["transfers"].sum())],
+        "NUMBER_OF_USERS": [users.count()],
+        "VOLUME_OF_TRANSFERS": [round(cube["volume_usd"].sum())],
+    })
+
+
+# --- Time Series ------------------------------------------------------------------------------------------------------
+def time_series(cube, users, timeframe):
+    key = lambda df: truncate_dates(_dates(df), timeframe).rename("DATE")
+    df = _summarize(cube, users, key).sort_index().reset_index()
+    return pd.DataFrame({
+        "DATE": df["DATE"],
+        "NUMBER_OF_TRANSFERS": df["transfers"],
+        "NUMBER_OF_USERS": df["users"],
+        "VOLUME_OF_TRANSFERS": df["volume_usd"].round(),
+    })
+
+
+# --- Chain and Path Breakdowns ----------------------------------------------------------------------------------------
+def _breakdown(cube, users, key, label, volume_label):
+    df = _summarize(cube, users, key).reset_index()
+    df = pd.DataFrame({
+        label: df.iloc[:, 0],
+        "Number of Transfers": df["transfers"],
+        "Number of Users": df["users"],
+        volume_label: df["volume_usd"].round(),
+    })
+    return df.sort_values("Number of Transfers", ascending=False, kind="stable", ignore_index=True)
+
+
+def by_source_chain(cube, users):
+    return _breakdown(cube, users, lambda df: df["source_chain"], "Source Chain", "Volume of Transfers (USD)")
+
+
+def by_destination_chain(cube, users):
+    return _breakdown(cube, users, lambda df: df["destination_chain"], "Destination Chain", "Volume of Transfers (USD)")
+
+
+def by_path(cube, users):
+    return _breakdown(cube, users, _path, "PATH", "Volume of Transfers USD")
+
+
+def top_paths(cube, users, limit=25, page=1, search=""):
+    # one page of the path ranking plus an "Other" row rolling up every matching path not on the page, so the
+    # payload stays bounded however many chain pairs exist; search matches either chain, case-insensitively
+    paths = by_path(cube, users)
+    if search:
+        chains = paths["PATH"].str.split("➡", n=1, expand=True, regex=False)
+        needle = search.strip().lower()
+        matches = chains[0].str.lower().str.contains(needle, regex=False) | chains[1].str.lower().str.contains(needle, regex=False)
+        paths = paths[matches.fillna(False)].reset_index(drop=True)
+    offset = (page - 1) * limit
+    df = paths.iloc[offset:offset + limit]
+    rest = paths["PATH"].drop(df.index)
+    if len(rest):
+        in_rest = lambda cells: _path(cells).isin(rest).rename("other")
+        cells = cube[in_rest(cube)]
+        df = pd.concat([df, pd.DataFrame({
+            "PATH": [f"Other ({len(rest):,} paths)"],
+            "Number of Transfers": [int(cells["transfers"].sum())],
+            "Number of Users": [int(users.count(in_rest).get(True, 0))],
+            "Volume of Transfers USD": [round(cells["volume_usd"].sum())],
+        }, index=[offset + len(df)])])
+    return df, pd.DataFrame({"paths": [len(paths)]})
+
+
+# --- User Distributions -----------------------------------------------------------------------------------------------
+def per_user(user_days):
+    # one pass over the window's day x user rows; bucketing below never goes back to the events
+    grouped = user_days.groupby("uid", sort=False)
+    return pd.DataFrame({
+        "volume_usd": grouped["volume_usd"].sum(min_count=1),
+        "transfers": grouped["transfers"].sum(),
+        "active_days": grouped.size(),
+    })
+
+
+def user_distribution_by_volume(users, edges=VOLUME_BUCKET_EDGES):
+    volume = users["volume_usd"].dropna().to_numpy()
+    return _bucket_counts(volume, edges, volume_bucket_labels(edges), "Class")
+
+
+def user_distribution_by_active_days(users, edges=ACTIVE_DAYS_BUCKET_EDGES):
+    return _bucket_counts(users["active_days"].to_numpy(), edges, active_days_bucket_labels(edges), "Number of Active Days")
+
+
+# --- New and Returning Users -----------------------------------------------------------------------------------------
+def daily_new_users(first_seen, start_date, end_date):
+    # first_seen: the store's user registry column, one first-seen day per user
+    first_seen = first_seen[(first_seen >= pd.Timestamp(start_date)) & (first_seen <= pd.Timestamp(end_date))]
+    return first_seen.value_counts().sort_index().rename_axis("day").rename("new_users")
+
+
+def active_users(users, timeframe):
+    return users.count(lambda df: truncate_dates(df["day"], timeframe).rename("Date"))
+
+
+def new_users(daily, timeframe, active=None):
+    # first-seen counts are additive, so week and month are sums over the daily series; every new user is active in
+    # its first period, so returning users are the period's active users minus its new users
+    counts = daily.groupby(truncate_dates(daily.index.to_series(), timeframe).to_numpy()).sum()
+    if active is not None:
+        counts = counts.reindex(counts.index.union(active.index), fill_value=0)
+    df = pd.DataFrame({
+        "Date": counts.index,
+        "New Users": counts.to_numpy(),
+        "Total New Users": counts.cumsum().to_numpy(),
+    })
+    if active is not None:
+        df["Returning Users"] = (active.reindex(counts.index, fill_value=0) - counts).clip(lower=0).to_numpy()
+    return df
@@ -0,0 +1,68 @@
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def configure_logging(level=logging.INFO, stream=None):
+    # one JSON object per line on stderr; idempotent across Streamlit reruns
+    if not any(getattr(handler, "_squid_perf", False) for handler in logger.handlers):
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler._squid_perf = True
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level)
+
+
+def result_size(value):
+    # (rows, in-memory bytes) of a section result: a DataFrame or a tuple of them
+    frames = value if isinstance(value, tuple) else (value,)
+    frames = [frame for frame in frames if isinstance(frame, pd.DataFrame)]
+    return sum(len(frame) for frame in frames), int(sum(frame.memory_usage(deep=True).sum() for frame in frames))
+
+
+# --- Rerun Trace ------------------------------------------------------------------------------------------------------
+# Spans for one script run: every loader, render and sync step records wall time plus whatever its stats dict
+# collects (rows, bytes, cache hit/miss, query ids, execute/fetch/convert seconds) and is logged as it closes.
+class Trace:
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, kind, **attrs):
+        stats = dict(attrs)
+        started = time.perf_counter()
+        try:
+            yield stats
+        except BaseException as error:
+            stats["error"] = type(error).__name__
+            raise
+        finally:
+            finished = time.perf_counter()
+            record = {
+                "run_id": self.run_id,
+                "span": name,
+                "kind": kind,
+                "start_seconds": round(started - self.started, 4),
+                "wall_seconds": round(finished - started, 4),
+                "thread": threading.current_thread().name,
+                **stats,
+            }
+            with self._lock:
+                self.spans.append(record)
+            logger.info(json.dumps(record, default=str))
+
+    def frame(self):
+        with self._lock:
+            return pd.DataFrame(self.spans)
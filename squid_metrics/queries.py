@@ -0,0 +1,153 @@
+import hashlib
+import json
+import re
+
+import pandas as pd
+
+# --- Squid Router Addresses -------------------------------------------------------------------------------------------
+ROUTER_ADDRESSES = [
+    "0xce16F69375520ab01377ce7B88f5BA8C48F8D666",
+    "0x492751eC3c57141deb205eC2da8bFcb410738630",
+    "0xDC3D8e1Abe590BCa428a8a2FC4CfDbD1AcF57Bd9",
+    "0xdf4fFDa22270c12d0b5b3788F1669D709476111E",
+    "0xe6B3949F9bBF168f4E3EFc82bc8FD849868CC6d8",
+]
+
+_ADDRESS = re.compile(r"0x[0-9a-f]{40}")
+
+
+# Router deployments matched by lowercase equality on each branch's router column. An address may carry the day it was
+# deployed (active_from) and only matches events from then on; once every address has one, queries also start no
+# earlier than the first deployment, so partitions from before Squid existed are pruned. The version plus a digest of
+# the entries versions the event store and every result built from it.
+class RouterRegistry:
+    def __init__(self, routers, version=1):
+        # routers: [(address, active_from or None)]
+        self.routers = {}
+        for address, active_from in routers:
+            address = str(address).strip().lower()
+            if not _ADDRESS.fullmatch(address):
+                raise ValueError(f"invalid router address {address!r}")
+            self.routers[address] = pd.Timestamp(active_from).normalize() if active_from else None
+        if not self.routers:
+            raise ValueError("router registry has no addresses")
+        self.version = version
+        entries = json.dumps([[address, str(active_from)] for address, active_from in sorted(self.routers.items())])
+        self.key = f"{version}.{hashlib.sha256(entries.encode('utf-8')).hexdigest()[:8]}"
+
+    @property
+    def first_active(self):
+        dates = list(self.routers.values())
+        return None if None in dates else min(dates)
+
+    def predicate(self, column):
+        # one IN list per activation day; addresses are validated hex, so inlining them is safe and keeps text stable
+        by_day = {}
+        for address, active_from in self.routers.items():
+            by_day.setdefault(active_from, []).append(f"'{address}'")
+        terms = []
+        for active_from, addresses in by_day.items():
+            term = f"LOWER({column}) IN ({', '.join(addresses)})"
+            if active_from is not None:
+                term += f" AND created_at >= DATE '{active_from:%Y-%m-%d}'"
+            terms.append(term)
+        return "\n          OR ".join(terms)
+
+
+DEFAULT_ROUTERS = RouterRegistry([(address, None) for address in ROUTER_ADDRESSES])
+
+
+def router_registry(settings=None):
+    # settings: the [routers] table, e.g. version = 2 and
+    # addresses = ["0x…", { address = "0x…", active_from = 2024-05-01 }]; without one, the built-in deployments
+    if not settings:
+        return DEFAULT_ROUTERS
+    entries = [
+        (entry, None) if isinstance(entry, str) else (entry["address"], entry.get("active_from"))
+        for entry in settings["addresses"]
+    ]
+    return RouterRegistry(entries, settings.get("version", 1))
+
+
+def _try_double(path):
+    return f"""CASE
+          WHEN IS_ARRAY({path}) OR IS_OBJECT({path}) THEN NULL
+          ELSE TRY_TO_DOUBLE({path}::STRING)
+        END"""
+
+
+# --- Branch Column Expressions ----------------------------------------------------------------------------------------
+# Every normalized event column, per fact table. Queries project only the columns they are asked for.
+TRANSFERS_COLUMNS = {
+    "created_at": "created_at",
+    "source_chain": "LOWER(data:send:original_source_chain)",
+    "destination_chain": "LOWER(data:send:original_destination_chain)",
+    "user": "recipient_address",
+    "amount_usd": f"{_try_double('data:send:amount')} * {_try_double('data:link:price')}",
+    "fee": _try_double("data:send:fee_value"),
+    "id": "id",
+    "service": "'Token Transfers'",
+    "asset": "data:link:asset::STRING",
+}
+
+GMP_COLUMNS = {
+    "created_at": "created_at",
+    "source_chain": "data:call.chain::STRING",
+    "destination_chain": "data:call.returnValues.destinationChain::STRING",
+    "user": "data:call.transaction.from::STRING",
+    "amount_usd": _try_double("data:value"),
+    "fee": f"""COALESCE(
+          {_try_double('data:gas:gas_used_amount')} * {_try_double('data:gas_price_rate:source_token.token_price.usd')},
+          {_try_double('data:fees:express_fee_usd')}
+        )""",
+    "id": "id",
+    "service": "'GMP'",
+    "asset": "data:symbol::STRING",
+}
+
+BRANCHES = {
+    "transfers": ("axelar.axelscan.fact_transfers", "sender_address", TRANSFERS_COLUMNS),
+    "gmp": ("axelar.axelscan.fact_gmp", "data:approved:returnValues:contractAddress::STRING", GMP_COLUMNS),
+}
+
+
+# --- Bind Parameters --------------------------------------------------------------------------------------------------
+# Queries use numeric binds (:1, :2) against a connection opened with paramstyle="numeric", so the query text is
+# identical for every date range and Snowflake's result cache can match it.
+def date_params(start_date, end_date, routers=None):
+    # [start, end] in whole days, bound as a half-open created_at range that partition pruning can use
+    start = pd.Timestamp(start_date).normalize()
+    if routers is not None and routers.first_active is not None:
+        start = max(start, routers.first_active)
+    end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+    return [start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")]
+
+
+def normalize_query(query):
+    return " ".join(query.split())
+
+
+def query_key(query, params=None):
+    # identifies a query execution: whitespace-normalized text plus its binds
+    payload = json.dumps({"query": normalize_query(query), "params": list(params or [])}, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+# --- Query Builder ----------------------------------------------------------------------------------------------------
+def build_branch_query(branch, columns=None, routers=DEFAULT_ROUTERS):
+    table, router_column, expressions = BRANCHES[branch]
+    columns = list(expressions) if columns is None else columns
+    select = ",\n        ".join(f"{expressions[name]} AS {name}" for name in columns)
+    return f"""
+    SELECT
+        {select}
+    FROM {table}
+    WHERE status = 'executed'
+      AND simplified_status = 'received'
+      AND created_at >= TO_TIMESTAMP_NTZ(:1)
+      AND created_at < TO_TIMESTAMP_NTZ(:2)
+      AND (
+          {routers.predicate(router_column)}
+      )
+    """
+
@@ -0,0 +1,188 @@
+import itertools
+import threading
+import time
+from concurrent.futures import Future, as_completed
+
+# lower runs first: first-paint loaders, then the rest of the page, then below-the-fold sections
+HIGH, NORMAL, LOW = 0, 1, 2
+
+
+class AdmissionError(RuntimeError):
+    pass
+
+
+class _Task:
+    def __init__(self, seq, fn, priority, session, deadline):
+        self.seq = seq
+        self.fn = fn
+        self.priority = priority
+        self.session = session
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.future = Future()
+
+    def run(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.fn()
+        except BaseException as error:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(result)
+
+
+# --- Query Scheduler --------------------------------------------------------------------------------------------------
+# One bounded worker pool per process with admission control. Work waits in a priority queue and each free worker
+# takes the highest-priority task whose session is under its per-session cap, so one session's full page load cannot
+# occupy every worker and cheap first-paint loaders never queue behind heavy ones. A full queue rejects new work and
+# tasks that wait longer than queue_timeout fail, both with AdmissionError.
+class QueryScheduler:
+    def __init__(self, max_workers=8, per_session=None, max_queued=None, queue_timeout=None):
+        self.max_workers = max_workers
+        self.per_session = per_session
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._queue = []
+        self._running = {}
+        self._closed = False
+        self._stats = {"submitted": 0, "completed": 0, "rejected": 0, "timed_out": 0, "peak_queued": 0, "wait_seconds_total": 0.0}
+        self._workers = [
+            threading.Thread(target=self._work, name=f"squid-query_{index}", daemon=True) for index in range(max_workers)
+        ]
+        if queue_timeout:
+            # expires waiting work even while every worker is busy
+            self._workers.append(threading.Thread(target=self._reap, name="squid-query-reaper", daemon=True))
+        for worker in self._workers:
+            worker.start()
+
+    def batch(self, thread_setup=None, session=None):
+        return QueryBatch(self, thread_setup, session)
+
+    def submit(self, fn, priority=NORMAL, session=None):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("query scheduler is shut down")
+            deadline = time.monotonic() + self.queue_timeout if self.queue_timeout else None
+            task = _Task(next(self._seq), fn, priority, session, deadline)
+            if self.max_queued is not None and len(self._queue) >= self.max_queued:
+                self._stats["rejected"] += 1
+                task.future.set_exception(AdmissionError(f"query queue is full ({len(self._queue)} waiting)"))
+                return task.future
+            self._queue.append(task)
+            self._stats["submitted"] += 1
+            self._stats["peak_queued"] = max(self._stats["peak_queued"], len(self._queue))
+            self._cond.notify_all()
+            return task.future
+
+    # --- Workers ------------------------------------------------------------------------------------------------------
+    def _expire(self, now):
+        # cancelled tasks (a superseded run's loaders) leave the queue without running or timing out
+        for task in [task for task in self._queue if task.future.cancelled()]:
+            self._queue.remove(task)
+        expired = [task for task in self._queue if task.deadline is not None and task.deadline <= now]
+        for task in expired:
+            self._queue.remove(task)
+            # claiming the future first means a cancel racing this expiry cannot leave it half-resolved
+            if task.future.set_running_or_notify_cancel():
+                self._stats["timed_out"] += 1
+                task.future.set_exception(AdmissionError(f"query waited over {self.queue_timeout}s for a free worker"))
+
+    def _reap(self):
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                self._expire(now)
+                deadlines = [task.deadline for task in self._queue]
+                self._cond.wait(min(deadlines) - now if deadlines else None)
+
+    def _admissible(self, task):
+        return task.session is None or self.per_session is None or self._running.get(task.session, 0) < self.per_session
+
+    def _next(self):
+        # highest priority first, FIFO within a priority, skipping sessions already at their cap
+        now = time.monotonic()
+        self._expire(now)
+        eligible = [task for task in self._queue if self._admissible(task)]
+        if not eligible:
+            deadlines = [task.deadline for task in self._queue if task.deadline is not None]
+            return None, (min(deadlines) - now if deadlines else None)
+        task = min(eligible, key=lambda task: (task.priority, task.seq))
+        self._queue.remove(task)
+        self._running[task.session] = self._running.get(task.session, 0) + 1
+        self._stats["wait_seconds_total"] += now - task.enqueued
+        return task, None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                task, wait = self._next()
+                while task is None:
+                    if self._closed:
+                        return
+                    self._cond.wait(wait)
+                    task, wait = self._next()
+            try:
+                task.run()
+            finally:
+                with self._cond:
+                    self._running[task.session] -= 1
+                    if not self._running[task.session]:
+                        del self._running[task.session]
+                    self._stats["completed"] += 1
+                    # a finished task may free its session's cap for work other workers skipped
+                    self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queued"] = len(self._queue)
+            stats["running"] = sum(self._running.values())
+            stats["max_workers"] = self.max_workers
+        started = stats["completed"] + stats["running"]
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / started if started else 0.0
+        return stats
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            for task in self._queue:
+                task.future.cancel()
+            self._queue.clear()
+            self._cond.notify_all()
+
+
+class QueryBatch:
+    def __init__(self, scheduler, thread_setup=None, session=None):
+        self._scheduler = scheduler
+        self._thread_setup = thread_setup
+        self._session = session
+        self._futures = {}
+        self.timings = {}
+        self.waits = {}
+
+    def _run(self, name, fn, args, kwargs, enqueued):
+        started = time.perf_counter()
+        self.waits[name] = started - enqueued
+        if self._thread_setup is not None:
+            self._thread_setup()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    def submit(self, name, fn, *args, priority=NORMAL, **kwargs):
+        enqueued = time.perf_counter()
+        future = self._scheduler.submit(lambda: self._run(name, fn, args, kwargs, enqueued), priority, self._session)
+        self._futures[future] = name
+        return future
+
+    def completed(self):
+        # yields (name, future) as each loader finishes; future.result() re-raises the loader's or admission's error
+        for future in as_completed(self._futures):
+            yield self._futures[future], future
+
+    def results(self):
+        return {name: future.result() for name, future in self.completed()}
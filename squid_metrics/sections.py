@@ -0,0 +1,118 @@
+import pandas as pd
+
+from . import metrics, rollup
+from .scheduler import HIGH, LOW, NORMAL
+
+# "approx" counts users with HyperLogLog sketches, "exact" with per-day user-id lists, and "refine" is exact but
+# paints an approximate KPI row first and swaps the exact one in as it lands
+USER_COUNT_MODES = ("approx", "exact", "refine")
+
+
+def exact_user_counts(mode):
+    if mode not in USER_COUNT_MODES:
+        raise ValueError(f"unknown user_count_mode {mode!r}, expected one of {USER_COUNT_MODES}")
+    return mode != "approx"
+
+
+# the landing page's inputs; the warm-up job precomputes exactly these views
+DEFAULT_START_DATE = "2023-01-01"
+DEFAULT_END_DATE = "2025-08-31"
+TIMEFRAMES = ("month", "week", "day")
+PATH_PAGE_SIZE = 25
+
+# scheduling order when sections compete for workers: the above-the-fold KPIs and time series go first
+PRIORITIES = {
+    "kpis": HIGH,
+    "time_series": HIGH,
+    "source_chains": NORMAL,
+    "destination_chains": NORMAL,
+    "paths": LOW,
+    "new_users": LOW,
+    "user_distributions": LOW,
+}
+
+
+def data_version(covered_start, watermark, source_version=None):
+    # the covered span, the watermark and the router registry together version the store's tables
+    return f"{covered_start}/{watermark}/{source_version}"
+
+
+def window_version(covered_start, watermark, source_version, end_date, refetch_days):
+    # Versions a section's results. Syncs only rewrite days from `refetch_days` before the watermark on, so a window
+    # ending earlier is settled and keyed without the watermark: its results, warmed or cached, survive every sync.
+    if watermark is not None:
+        settled_until = pd.Timestamp(watermark).normalize() - pd.Timedelta(days=refetch_days)
+        if pd.Timestamp(end_date).normalize() < settled_until:
+            watermark = "settled"
+    return data_version(covered_start, watermark, source_version)
+
+
+# --- Store Tables -----------------------------------------------------------------------------------------------------
+# What section loaders read. The dashboard passes an object whose methods go through its process-wide st.cache_*
+# loaders; headless callers use StoreTables, which reads each table from the store at most once.
+class StoreTables:
+    def __init__(self, event_store):
+        self.store = event_store
+        self._tables = {}
+
+    def _read(self, name, read):
+        if name not in self._tables:
+            self._tables[name] = read()
+        return self._tables[name]
+
+    def rollup(self):
+        return self._read("rollup", self.store.read_rollup)
+
+    def user_counter(self, exact):
+        return self._read(f"user_counter:{exact}", lambda: self.store.user_counter(exact=exact))
+
+    def user_registry(self):
+        return self._read("user_registry", self.store.user_registry)
+
+    def user_aggregates(self, start_date, end_date):
+        user_days = self._read("user_days", self.store.read_user_days)
+        return metrics.per_user(rollup.window(user_days, start_date, end_date))
+
+
+# --- Section Loaders --------------------------------------------------------------------------------------------------
+def new_total_users(registry, users, timeframe, start_date, end_date):
+    daily = metrics.daily_new_users(registry["first_seen"], start_date, end_date)
+    return metrics.new_users(daily, timeframe, metrics.active_users(users, timeframe))
+
+
+def user_distributions(users, volume_edges, active_days_edges):
+    return (
+        metrics.user_distribution_by_volume(users, volume_edges),
+        metrics.user_distribution_by_active_days(users, active_days_edges),
+    )
+
+
+# name -> (params, compute). Each section is keyed on exactly the inputs its loader reads, so e.g. the chain tables
+# are shared across timeframes, and on the window's version (see window_version). Inputs are normalized here so the
+# dashboard and the warm-up job build identical keys.
+def build(tables, start_date, end_date, timeframe, data_version, exact,
+          volume_edges=metrics.VOLUME_BUCKET_EDGES, active_days_edges=metrics.ACTIVE_DAYS_BUCKET_EDGES,
+          path_page=1, path_search=""):
+    start_date, end_date = pd.Timestamp(start_date).date(), pd.Timestamp(end_date).date()
+    volume_edges = [float(edge) for edge in volume_edges]
+    active_days_edges = [int(edge) for edge in active_days_edges]
+
+    window_params = {"start_date": start_date, "end_date": end_date, "data_version": data_version}
+    user_params = {**window_params, "exact": exact}
+    timeframe_params = {**user_params, "timeframe": timeframe}
+    path_params = {**user_params, "page": path_page, "search": path_search, "page_size": PATH_PAGE_SIZE}
+    distribution_params = {**window_params, "volume_edges": volume_edges, "active_days_edges": active_days_edges}
+
+    # windowed lazily inside each loader, so a run served entirely from the result cache never reads the tables
+    cube = lambda: rollup.window(tables.rollup(), start_date, end_date)
+    users = lambda: tables.user_counter(exact).window(start_date, end_date)
+
+    return {
+        "kpis": (user_params, lambda: metrics.kpis(cube(), users())),
+        "time_series": (timeframe_params, lambda: metrics.time_series(cube(), users(), timeframe)),
+        "source_chains": (user_params, lambda: metrics.by_source_chain(cube(), users())),
+        "destination_chains": (user_params, lambda: metrics.by_destination_chain(cube(), users())),
+        "paths": (path_params, lambda: metrics.top_paths(cube(), users(), PATH_PAGE_SIZE, path_page, path_search)),
+        "new_users": (timeframe_params, lambda: new_total_users(tables.user_registry(), users(), timeframe, start_date, end_date)),
+        "user_distributions": (distribution_params, lambda: user_distributions(tables.user_aggregates(start_date, end_date), volume_edges, active_days_edges)),
+    }
@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import Future
+
+
+# --- Single Flight ----------------------------------------------------------------------------------------------------
+# Concurrent do() calls with the same key wait on one execution and share its result or its error. Only in-flight work
+# is shared: once the leading call returns, the next call for that key executes again.
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"executions": 0, "coalesced": 0, "peak_in_flight": 0}
+
+    def do(self, key, fn):
+        # returns (value, shared); shared is True when this call waited on another caller's execution
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+                self._stats["executions"] += 1
+                self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], len(self._calls))
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            return call.result(), True
+        try:
+            value = fn()
+        except BaseException as error:
+            call.set_exception(error)
+            raise
+        else:
+            call.set_result(value)
+            return value, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
@@ -0,0 +1,143 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# --- Distinct-User Sketches -------------------------------------------------------------------------------------------
+# Users per day x source_chain x destination_chain, kept next to the rollup cube so COUNT(DISTINCT user) for any
+# date range, chain or path is a merge of stored cells instead of a warehouse query.
+#
+# approx: HyperLogLog in sparse long form, one (cell, register, rho) row per non-empty register. Merging is a max
+#         over registers; the relative standard error is 1.04 / sqrt(2 ** precision), e.g. 0.81% at precision 14.
+# exact:  per-cell sorted lists of dense user ids from the store's user dictionary; merging is a distinct count.
+SKETCH_KEYS = ["day", "source_chain", "destination_chain"]
+DEFAULT_PRECISION = 14
+MIN_PRECISION, MAX_PRECISION = 4, 16
+
+_CELL_FIELDS = [
+    ("day", pa.timestamp("ns")),
+    ("source_chain", pa.string()),
+    ("destination_chain", pa.string()),
+]
+HLL_SCHEMA = pa.schema([*_CELL_FIELDS, ("register", pa.int32()), ("rho", pa.int8())])
+EXACT_SCHEMA = pa.schema([*_CELL_FIELDS, ("uid", pa.int32())])
+
+
+def relative_error(precision):
+    return 1.04 / math.sqrt(1 << precision)
+
+
+def _check_precision(precision):
+    if not MIN_PRECISION <= precision <= MAX_PRECISION:
+        raise ValueError(f"sketch precision must be between {MIN_PRECISION} and {MAX_PRECISION}, got {precision}")
+
+
+def _bit_length(values):
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        wide = values >= (np.uint64(1) << np.uint64(shift))
+        length[wide] += shift
+        values[wide] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+def _cells(events):
+    events = events.dropna(subset=["user"])
+    cells = pd.DataFrame({
+        "day": events["created_at"].dt.normalize().to_numpy(),
+        "source_chain": events["source_chain"].to_numpy(),
+        "destination_chain": events["destination_chain"].to_numpy(),
+    })
+    return cells, events["user"]
+
+
+# --- Build --------------------------------------------------------------------------------------------------------------
+def build_hll(events, precision=DEFAULT_PRECISION):
+    _check_precision(precision)
+    cells, users = _cells(events)
+    hashes = pd.util.hash_array(users.to_numpy(dtype=object))
+    suffix_bits = 64 - precision
+    suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+    cells["register"] = (hashes >> np.uint64(suffix_bits)).astype(np.int32)
+    cells["rho"] = (suffix_bits + 1 - _bit_length(suffix)).astype(np.int8)
+    return cells.groupby([*SKETCH_KEYS, "register"], dropna=False, observed=True, sort=False)["rho"].max().reset_index()
+
+
+def build_exact(events, user_index):
+    cells, users = _cells(events)
+    cells["uid"] = user_index.get_indexer(users).astype(np.int32)
+    return cells.drop_duplicates().sort_values([*SKETCH_KEYS, "uid"], ignore_index=True)
+
+
+# --- Estimate -----------------------------------------------------------------------------------------------------------
+# Ertl's improved raw estimator ("New cardinality estimation algorithms for HyperLogLog sketches", 2017). It works on
+# the register histogram and stays unbiased across the whole range, so there is no switch to linear counting (the raw
+# estimate is biased by several standard errors just above it) and no empirical bias table.
+_ITERATIONS = 64
+
+
+def _sigma(x):
+    y, z = 1.0, x.copy()
+    for _ in range(_ITERATIONS):
+        x = x * x
+        z += x * y
+        y *= 2
+    return z
+
+
+def _tau(x):
+    y, z = 1.0, 1 - x
+    for _ in range(_ITERATIONS):
+        x = np.sqrt(x)
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+    return z / 3
+
+
+def _hll_estimate(merged, precision):
+    # merged: rho per (group, register) after the max-merge
+    m = 1 << precision
+    q = 64 - precision
+    codes, groups = pd.factorize(merged.index.get_level_values(0), use_na_sentinel=False)
+    histogram = np.zeros((len(groups), q + 2))
+    np.add.at(histogram, (codes, merged.to_numpy(dtype=np.int64)), 1)
+    histogram[:, 0] = m - histogram[:, 1:].sum(axis=1)
+    z = m * _tau(1 - histogram[:, q + 1] / m)
+    for k in range(q, 0, -1):
+        z = (z + histogram[:, k]) * 0.5
+    with np.errstate(over="ignore"):
+        z = z + m * _sigma(histogram[:, 0] / m)
+    estimate = m * m / (2 * math.log(2) * z)
+    return pd.Series(np.round(estimate).astype("int64"), index=groups.rename(merged.index.names[0]))
+
+
+class UserCounter:
+    def __init__(self, table, exact=False, precision=DEFAULT_PRECISION):
+        self.table = table
+        self.exact = exact
+        self.precision = precision
+
+    @property
+    def error(self):
+        return 0.0 if self.exact else relative_error(self.precision)
+
+    def window(self, start_date, end_date):
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize()
+        table = self.table[(self.table["day"] >= start) & (self.table["day"] <= end)]
+        return UserCounter(table, exact=self.exact, precision=self.precision)
+
+    def count(self, key=None):
+        # key maps the cell table to a grouping Series; None counts users over all cells
+        table = self.table
+        group = pd.Series(0, index=table.index) if key is None else key(table)
+        if self.exact:
+            counts = table["uid"].groupby(group, dropna=False, observed=True, sort=False).nunique()
+        else:
+            merged = table.groupby([group, table["register"]], dropna=False, observed=True, sort=False)["rho"].max()
+            counts = _hll_estimate(merged, self.precision)
+        if key is None:
+            return int(counts.iloc[0]) if len(counts) else 0
+        return counts.rename("users")
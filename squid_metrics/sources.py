@@ -0,0 +1,217 @@
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from . import queries
+
+MODES = ("live", "record", "replay")
+
+
+def _atomic_write(path, write):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+# --- Recordings -------------------------------------------------------------------------------------------------------
+# One Arrow IPC file plus a JSON sidecar (query, params, query id, timings, rows) per distinct query text and binds.
+class Recordings:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, key):
+        return self.root / f"{key}.arrow", self.root / f"{key}.json"
+
+    def save(self, query, params, batches, timings):
+        data_path, meta_path = self._paths(queries.query_key(query, params))
+        if batches:
+            table = pa.concat_tables(batches, promote_options="permissive")
+
+            def write(tmp):
+                with ipc.new_file(tmp, table.schema) as writer:
+                    writer.write_table(table)
+            _atomic_write(data_path, write)
+        meta = {"query": queries.normalize_query(query), "params": list(params or []), "rows": sum(b.num_rows for b in batches), **timings}
+        _atomic_write(meta_path, lambda tmp: tmp.write_text(json.dumps(meta, indent=2, default=str)))
+
+    def load(self, query, params):
+        data_path, meta_path = self._paths(queries.query_key(query, params))
+        try:
+            meta = json.loads(meta_path.read_text())
+        except FileNotFoundError:
+            raise LookupError(f"no recording for this query and params under {self.root}; run once in record mode") from None
+        table = ipc.open_file(data_path).read_all() if meta["rows"] else None
+        return meta, table
+
+    def recorded_day(self):
+        # the UTC day of the latest recording, i.e. the "today" the recorded store syncs ran up to
+        recorded = [json.loads(path.read_text()).get("recorded_at") for path in self.root.glob("*.json")]
+        recorded = [value for value in recorded if value is not None]
+        return pd.Timestamp(max(recorded), unit="s").normalize() if recorded else None
+
+
+# --- Record Mode ------------------------------------------------------------------------------------------------------
+class _RecordingCursor:
+    def __init__(self, cursor, recordings):
+        self._cursor = cursor
+        self._recordings = recordings
+        self.sfqid = None
+
+    def execute(self, query, params=None):
+        self._query, self._params = query, params
+        self._started = time.perf_counter()
+        self._cursor.execute(query, params)
+        self._execute_seconds = time.perf_counter() - self._started
+        self.sfqid = self._cursor.sfqid
+        return self
+
+    def execute_async(self, query, params=None):
+        self._query, self._params = query, params
+        self._started = time.perf_counter()
+        self._cursor.execute_async(query, params)
+        self.sfqid = self._cursor.sfqid
+        return self
+
+    def get_results_from_sfqid(self, query_id):
+        self._cursor.get_results_from_sfqid(query_id)
+        self._execute_seconds = time.perf_counter() - self._started
+
+    def abort_query(self, query_id):
+        return self._cursor.abort_query(query_id)
+
+    def fetch_arrow_batches(self):
+        batches = []
+        for batch in self._cursor.fetch_arrow_batches():
+            batches.append(batch)
+            yield batch
+        # saved only once the whole result has streamed through
+        self._recordings.save(self._query, self._params, batches, {
+            "query_id": self.sfqid,
+            "execute_seconds": self._execute_seconds,
+            "fetch_seconds": time.perf_counter() - self._started,
+            "recorded_at": time.time(),
+        })
+
+    def close(self):
+        self._cursor.close()
+
+
+class _RecordingConnection:
+    def __init__(self, conn, recordings):
+        self._conn = conn
+        self._recordings = recordings
+
+    def cursor(self):
+        return _RecordingCursor(self._conn.cursor(), self._recordings)
+
+
+class RecordingSource:
+    def __init__(self, source, root):
+        self.source = source
+        self.recordings = Recordings(root)
+
+    @contextmanager
+    def connection(self):
+        with self.source.connection() as conn:
+            yield _RecordingConnection(conn, self.recordings)
+
+
+# --- Replay Mode ------------------------------------------------------------------------------------------------------
+# Serves recorded results without a warehouse. latency_scale=1.0 sleeps for the recorded execute and fetch times,
+# 0 replays as fast as possible. abort_query cuts the simulated latency short, like a server-side cancel. Store syncs
+# bind the current day, so replay pins "today" to replay_date or the day the recordings were made.
+_replay_ids = itertools.count(1)
+
+class _ReplayCursor:
+    def __init__(self, source):
+        self._source = source
+        self._aborted = threading.Event()
+        self.sfqid = None
+
+    def _sleep(self, seconds):
+        if self._source.sleep(seconds, self._aborted):
+            raise RuntimeError(f"query {self.sfqid} was aborted")
+
+    def execute_async(self, query, params=None):
+        self._meta, self._table = self._source.recordings.load(query, params)
+        self.sfqid = f"replay-{next(_replay_ids)}-{self._meta.get('query_id')}"
+        return self
+
+    def get_results_from_sfqid(self, query_id):
+        self._sleep(self._meta.get("execute_seconds", 0.0))
+
+    def execute(self, query, params=None):
+        self.execute_async(query, params)
+        self.get_results_from_sfqid(self.sfqid)
+        return self
+
+    def abort_query(self, query_id):
+        if query_id != self.sfqid:
+            return False
+        self._aborted.set()
+        return True
+
+    def fetch_arrow_batches(self):
+        self._sleep(self._meta.get("fetch_seconds", 0.0) - self._meta.get("execute_seconds", 0.0))
+        if self._table is None:
+            return
+        for batch in self._table.to_batches():
+            yield pa.Table.from_batches([batch])
+
+    def close(self):
+        pass
+
+
+class _ReplayConnection:
+    def __init__(self, source):
+        self._source = source
+
+    def cursor(self):
+        return _ReplayCursor(self._source)
+
+
+class ReplaySource:
+    def __init__(self, root, latency_scale=1.0, replay_date=None):
+        self.recordings = Recordings(root)
+        self.latency_scale = float(latency_scale)
+        self.today = pd.Timestamp(replay_date).normalize() if replay_date else self.recordings.recorded_day()
+
+    def sleep(self, seconds, aborted):
+        # True when aborted before the recorded latency elapsed
+        if self.latency_scale > 0 and seconds > 0:
+            return aborted.wait(seconds * self.latency_scale)
+        return aborted.is_set()
+
+    @contextmanager
+    def connection(self):
+        yield _ReplayConnection(self)
+
+
+# --- Data Source ------------------------------------------------------------------------------------------------------
+# live queries Snowflake through the pool, record does the same and keeps every result, replay never touches the
+# warehouse. All three expose the pool's connection() so loaders are unaware of the mode.
+def open_data_source(settings, live_pool):
+    # live_pool is a callable so replay mode never opens (or needs credentials for) a Snowflake connection
+    mode = settings.get("mode", "live")
+    if mode not in MODES:
+        raise ValueError(f"unknown data source mode {mode!r}, expected one of {MODES}")
+    root = settings.get("path", ".squid_recordings")
+    if mode == "replay":
+        return ReplaySource(root, settings.get("replay_latency_scale", 1.0), settings.get("replay_date"))
+    if mode == "record":
+        return RecordingSource(live_pool(), root)
+    return live_pool()
+
+
+def sync_until(data_source):
+    # the last day store syncs fetch: today (None), or in replay mode the day the recordings cover
+    return data_source.today if isinstance(data_source, ReplaySource) else None
@@ -0,0 +1,355 @@
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from . import events, fetch, rollup, sketches
+
+# --- Event Schema -----------------------------------------------------------------------------------------------------
+EVENT_SCHEMA = pa.schema([
+    ("created_at", pa.timestamp("ns")),
+    ("source_chain", pa.string()),
+    ("destination_chain", pa.string()),
+    ("user", pa.string()),
+    ("amount_usd", pa.float64()),
+    ("fee", pa.float64()),
+    ("id", pa.string()),
+    ("service", pa.string()),
+    ("asset", pa.string()),
+])
+
+USERS_SCHEMA = pa.schema([("user", pa.string()), ("first_seen", pa.timestamp("ns"))])
+
+
+def _atomic_write(path, write):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _first_seen(events):
+    events = events.dropna(subset=["user"])
+    return events.groupby("user", sort=False)["created_at"].min().dt.normalize()
+
+
+def _utc_today():
+    return pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+
+
+# --- Local Columnar Event Store ---------------------------------------------------------------------------------------
+# Normalized Squid events on disk as one Parquet file per day (events/day=YYYY-MM-DD/part-0.parquet).
+# Each sync re-fetches whole days starting `refetch_days` before the created_at high-watermark, so rows
+# that reach status = 'executed' late are picked up and every re-synced day is replaced atomically.
+# Day-keyed derived tables (rollup cube, user sketches, exact user ids, per-user days) are partitioned the same way
+# (derived/<table>/day=YYYY-MM-DD/part-0.parquet) and only the re-synced days are replaced, and users.parquet is the
+# append-only user registry behind new-user counts and dense user ids.
+# The store covers whole days from its recorded start: a request reaching earlier backfills only the missing leading
+# days, and any range inside the covered span is answered from disk at daily grain. source_version identifies which
+# events fetch selects (the router registry); a store synced under another one refetches its whole covered span.
+# Several processes may share one store (dashboard servers, the warm-up job), so every read-modify-write of its files
+# runs under an exclusive flock on store.lock and re-reads the state and user registry inside it. Waiting longer than
+# lock_timeout seconds for it raises TimeoutError (None waits indefinitely).
+class EventStore:
+    def __init__(self, root, history_start="2022-01-01", refetch_days=2, sketch_precision=sketches.DEFAULT_PRECISION,
+                 source_version=None, lock_timeout=30):
+        sketches._check_precision(sketch_precision)
+        self.root = Path(root)
+        self.history_start = pd.Timestamp(history_start).normalize()
+        self.refetch_days = int(refetch_days)
+        self.sketch_precision = int(sketch_precision)
+        self.source_version = source_version
+        self.lock_timeout = lock_timeout
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._derived = {
+            "rollup": (rollup.ROLLUP_SCHEMA, rollup.build_rollup),
+            "user_sketches": (sketches.HLL_SCHEMA, lambda df: sketches.build_hll(df, self.sketch_precision)),
+            "user_ids": (sketches.EXACT_SCHEMA, lambda df: sketches.build_exact(df, self.user_index())),
+            "user_days": (rollup.USER_DAYS_SCHEMA, lambda df: rollup.build_user_days(df, self.user_index())),
+        }
+
+    def _lock_file(self, lock_file, deadline):
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"event store {self.root} stayed locked for {self.lock_timeout}s") from None
+                time.sleep(0.05)
+
+    @contextmanager
+    def _locked(self):
+        # reentrant within the process; only the outermost holder takes the file lock
+        deadline = None if self.lock_timeout is None else time.monotonic() + self.lock_timeout
+        if not self._lock.acquire(timeout=-1 if deadline is None else self.lock_timeout):
+            raise TimeoutError(f"event store {self.root} stayed locked for {self.lock_timeout}s")
+        try:
+            if self._lock_depth or fcntl is None:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / "store.lock", "a") as lock_file:
+                self._lock_file(lock_file, deadline)
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            self._lock.release()
+
+    # --- State --------------------------------------------------------------------------------------------------------
+    @property
+    def _state_path(self):
+        return self.root / "state.json"
+
+    def _read_state(self):
+        try:
+            return json.loads(self._state_path.read_text())
+        except FileNotFoundError:
+            return {}
+
+    def _write_state(self, state):
+        _atomic_write(self._state_path, lambda tmp: tmp.write_text(json.dumps(state, indent=2)))
+
+    def watermark(self):
+        value = self._read_state().get("watermark")
+        return pd.Timestamp(value) if value else None
+
+    def covered_start(self):
+        value = self._read_state().get("history_start")
+        return pd.Timestamp(value) if value else self.history_start
+
+    # --- Partitions ---------------------------------------------------------------------------------------------------
+    def _partition_path(self, day):
+        return self.root / "events" / f"day={day:%Y-%m-%d}" / "part-0.parquet"
+
+    def _write_day(self, day, df):
+        path = self._partition_path(day)
+        if df.empty:
+            path.unlink(missing_ok=True)
+            return
+        table = pa.Table.from_pandas(df[events.EVENT_COLUMNS], schema=EVENT_SCHEMA, preserve_index=False)
+        _atomic_write(path, lambda tmp: pq.write_table(table, tmp))
+
+    def _existing_partitions(self, start_date, end_date):
+        days = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(), freq="D")
+        paths = (self._partition_path(day) for day in days)
+        return [str(path) for path in paths if path.exists()]
+
+    # --- Sync ---------------------------------------------------------------------------------------------------------
+    def sync(self, fetch, until=None):
+        # fetch(since, until) returns normalized events for whole days in [since, until]
+        with self._locked():
+            watermark = self.watermark()
+            until = pd.Timestamp(until).normalize() if until is not None else _utc_today()
+            covered_start = self.covered_start()
+            if watermark is None:
+                since = covered_start
+            elif self._read_state().get("source_version") != self.source_version:
+                # every stored day was selected by another router registry; the user registry restarts with them
+                since = covered_start
+                self._users_path.unlink(missing_ok=True)
+            else:
+                since = max(watermark.normalize() - pd.Timedelta(days=self.refetch_days), covered_start)
+
+            fetched = fetch(since, until)
+            self._write_days(since, until, fetched)
+
+            if not fetched.empty:
+                latest = fetched["created_at"].max()
+                watermark = latest if watermark is None else max(watermark, latest)
+            self._write_state({
+                **self._read_state(),
+                "history_start": covered_start.isoformat(),
+                "watermark": watermark.isoformat() if watermark is not None else None,
+                "sketch_precision": self.sketch_precision,
+                "source_version": self.source_version,
+                "synced_at": pd.Timestamp.now(tz="UTC").isoformat(),
+            })
+            return {"since": since, "until": until, "rows": len(fetched), "watermark": watermark}
+
+    def extend(self, start_date, fetch):
+        # fetch(since, until) as for sync; returns the covered start after backfilling
+        start = pd.Timestamp(start_date).normalize()
+        if start >= self.covered_start() or self.watermark() is None:
+            # the common case runs on every page load and never waits for the lock
+            return self.covered_start()
+        with self._locked():
+            covered_start = self.covered_start()
+            if start >= covered_start:
+                return covered_start
+            until = covered_start - pd.Timedelta(days=1)
+            self._write_days(start, until, fetch(start, until))
+            self._write_state({**self._read_state(), "history_start": start.isoformat()})
+            return start
+
+    def _write_days(self, since, until, fetched):
+        by_day = dict(list(fetched.groupby(fetched["created_at"].dt.normalize())))
+        for day in pd.date_range(since, until, freq="D"):
+            self._write_day(day, by_day.get(day, fetched.iloc[:0]))
+        self._update_derived(since, until, fetched)
+
+    # --- User Registry ------------------------------------------------------------------------------------------------
+    # users.parquet: one row per user with its first-seen day. Row order is append-only, so the row number doubles as
+    # the dense exact-mode user id, and each sync only merges the first-seen days of the fetched events.
+    @property
+    def _users_path(self):
+        return self.root / "users.parquet"
+
+    def _write_registry(self, registry):
+        table = pa.Table.from_pandas(registry, schema=USERS_SCHEMA, preserve_index=False)
+        _atomic_write(self._users_path, lambda tmp: pq.write_table(table, tmp))
+
+    def user_registry(self):
+        if not self._users_path.exists():
+            return USERS_SCHEMA.empty_table().to_pandas()
+        registry = pq.read_table(self._users_path).to_pandas()
+        if "first_seen" not in registry.columns:
+            # dictionaries written before first-seen tracking are backfilled once from the stored partitions
+            with self._locked():
+                registry = pq.read_table(self._users_path).to_pandas()
+                if "first_seen" not in registry.columns:
+                    history = self.read(self.covered_start(), _utc_today(), columns=["created_at", "user"])
+                    registry["first_seen"] = registry["user"].map(_first_seen(history))
+                    self._write_registry(registry)
+        return registry
+
+    def user_index(self):
+        return pd.Index(self.user_registry()["user"], name="user")
+
+    def _update_user_registry(self, fetched):
+        registry = self.user_registry()
+        seen = _first_seen(fetched)
+        known = pd.Index(registry["user"])
+        # backfilled days can move a known user's first-seen day earlier
+        earlier = pd.Series(seen.reindex(known).to_numpy(), index=registry.index)
+        moved = earlier < registry["first_seen"]
+        new = seen.index.difference(known)
+        if moved.any() or len(new):
+            registry.loc[moved, "first_seen"] = earlier[moved]
+            added = pd.DataFrame({"user": new, "first_seen": seen.reindex(new).to_numpy()})
+            self._write_registry(pd.concat([registry, added], ignore_index=True) if len(registry) else added)
+
+    # --- Derived Tables -----------------------------------------------------------------------------------------------
+    # state.json lists the tables built in this layout; a table missing from it (an older store, or sketches at another
+    # precision) is rebuilt once from the stored event partitions.
+    def _derived_dir(self, name):
+        return self.root / "derived" / name
+
+    def _derived_day_path(self, name, day):
+        return self._derived_dir(name) / f"day={day:%Y-%m-%d}" / "part-0.parquet"
+
+    def _write_derived_days(self, name, since, until, df):
+        schema = self._derived[name][0]
+        by_day = dict(list(df.groupby("day")))
+        for day in pd.date_range(since, until, freq="D"):
+            path = self._derived_day_path(name, day)
+            rows = by_day.get(day)
+            if rows is None or rows.empty:
+                path.unlink(missing_ok=True)
+                continue
+            table = pa.Table.from_pandas(rows[schema.names], schema=schema, preserve_index=False)
+            _atomic_write(path, lambda tmp: pq.write_table(table, tmp))
+
+    def _is_built(self, name):
+        state = self._read_state()
+        if name == "user_sketches" and state.get("sketch_precision") != self.sketch_precision:
+            return False
+        return name in state.get("derived_tables", [])
+
+    def _rebuild_derived(self, name):
+        history = self.read(self.covered_start(), _utc_today())
+        self._update_user_registry(history)
+        table = self._derived[name][1](history)
+        shutil.rmtree(self._derived_dir(name), ignore_errors=True)
+        if len(table):
+            self._write_derived_days(name, table["day"].min(), table["day"].max(), table)
+        # single-file tables from before the day layout
+        (self.root / f"{name}.parquet").unlink(missing_ok=True)
+        state = self._read_state()
+        built = sorted({*state.get("derived_tables", []), name})
+        self._write_state({**state, "derived_tables": built, "sketch_precision": self.sketch_precision})
+        return table
+
+    def _update_derived(self, since, until, fetched):
+        # rebuilds only the re-fetched days [since, until] of each table; other days' files are untouched
+        self._update_user_registry(fetched)
+        for name, (_, build) in self._derived.items():
+            if not self._is_built(name):
+                # the stored partitions already hold the fetched days
+                self._rebuild_derived(name)
+                continue
+            self._write_derived_days(name, since, until, build(fetched))
+
+    def _read_derived_days(self, name):
+        if not self._is_built(name):
+            return None
+        schema = self._derived[name][0]
+        files = sorted(str(path) for path in self._derived_dir(name).glob("day=*/part-0.parquet"))
+        table = ds.dataset(files, schema=schema, format="parquet").to_table() if files else schema.empty_table()
+        return fetch.to_frame(table, events.EVENT_CATEGORIES)
+
+    def read_derived(self, name):
+        table = self._read_derived_days(name)
+        if table is not None:
+            return table
+        with self._locked():
+            # another process may have built it while this one waited
+            table = self._read_derived_days(name)
+            if table is not None:
+                return table
+            if self.watermark() is None:
+                return self._derived[name][1](self.read(self.covered_start(), _utc_today()))
+            return self._rebuild_derived(name)
+
+    def read_rollup(self):
+        return self.read_derived("rollup")
+
+    def read_user_days(self):
+        return self.read_derived("user_days")
+
+    def user_counter(self, exact=False):
+        table = self.read_derived("user_ids" if exact else "user_sketches")
+        return sketches.UserCounter(table, exact=exact, precision=self.sketch_precision)
+
+    # --- Read ---------------------------------------------------------------------------------------------------------
+    def read(self, start_date, end_date, columns=None):
+        files = self._existing_partitions(start_date, end_date)
+        if not files:
+            table = EVENT_SCHEMA.empty_table()
+            table = table.select(columns) if columns else table
+        else:
+            table = ds.dataset(files, schema=EVENT_SCHEMA, format="parquet").to_table(columns=columns)
+        return fetch.to_frame(table, events.EVENT_CATEGORIES)
+
+
+def open_event_store(settings, source_version=None):
+    return EventStore(
+        settings.get("path", ".squid_store"),
+        history_start=settings.get("history_start", "2022-01-01"),
+        refetch_days=settings.get("refetch_days", 2),
+        sketch_precision=settings.get("sketch_precision", sketches.DEFAULT_PRECISION),
+        source_version=source_version,
+        lock_timeout=settings.get("lock_timeout_seconds", 30),
+    )
@@ -0,0 +1,117 @@
+import argparse
+import json
+import sys
+import tomllib
+from pathlib import Path
+
+from . import cache, connection, events, perf, queries, scheduler, sections, sources, store
+
+
+def load_settings(path):
+    # the dashboard's own secrets file, so the job syncs the same store and fills the same result cache
+    try:
+        with open(path, "rb") as settings_file:
+            return tomllib.load(settings_file)
+    except FileNotFoundError:
+        return {}
+
+
+# --- Warm-up ----------------------------------------------------------------------------------------------------------
+# Syncs the event store and precomputes every section of the given range for each timeframe into the persistent
+# result cache, through the same section definitions as the dashboard so the landing page's keys are warm.
+def warm(settings, start_date, end_date, timeframes=sections.TIMEFRAMES, refresh=False, trace=None):
+    trace = trace or perf.Trace()
+    snowflake_secrets = settings.get("snowflake", {})
+    store_settings = settings.get("event_store", {})
+    routers = queries.router_registry(settings.get("routers"))
+    pools = []
+
+    def live_pool():
+        pools.append(connection.open_pool(snowflake_secrets))
+        return pools[-1]
+
+    data_source = sources.open_data_source(settings.get("data_source", {}), live_pool)
+    query_scheduler = scheduler.QueryScheduler(max_workers=snowflake_secrets.get("max_concurrent_queries", 8))
+    try:
+        event_store = store.open_event_store(store_settings, routers.key)
+        # a batch job waits out a dashboard's sync rather than falling back like a page does
+        event_store.lock_timeout = None
+
+        def fetch(since, until):
+            with trace.span("extract", "query", since=str(since), until=str(until)) as stats:
+                df = events.load_events_concurrently(data_source, query_scheduler, since, until, stats=stats, routers=routers)
+                stats["rows"] = len(df)
+                return df
+
+        with trace.span("sync_event_store", "sync") as stats:
+            watermark = event_store.sync(fetch, sources.sync_until(data_source))["watermark"]
+            stats["watermark"] = str(watermark)
+        with trace.span("extend_event_store", "sync") as stats:
+            covered_start = event_store.extend(start_date, fetch)
+            stats["covered_start"] = str(covered_start)
+        data_version = sections.window_version(covered_start, watermark, routers.key, end_date, event_store.refetch_days)
+
+        exact = sections.exact_user_counts(store_settings.get("user_count_mode", "refine"))
+        tables = sections.StoreTables(event_store)
+        result_cache = cache.open_result_cache(settings.get("result_cache", {}))
+        warmed = set()
+        for timeframe in timeframes:
+            for name, (params, compute) in sections.build(tables, start_date, end_date, timeframe, data_version, exact).items():
+                # sections that ignore the timeframe share one entry across all of them
+                key = result_cache.key(name, params)
+                if key in warmed:
+                    continue
+                warmed.add(key)
+                attrs = {"timeframe": timeframe} if "timeframe" in params else {}
+                with trace.span(name, "loader", **attrs) as stats:
+                    value = result_cache.get_or_compute(name, params, compute, stats, refresh=refresh)
+                    stats["rows"], stats["bytes"] = perf.result_size(value)
+    finally:
+        query_scheduler.shutdown()
+        for pool in pools:
+            pool.close()
+    return trace.frame()
+
+
+def summarize(spans):
+    loaders = spans[spans["kind"] == "loader"]
+    computed = loaders[loaders["cache"] != "hit"]
+    return {
+        "run_id": spans["run_id"].iloc[0],
+        "sections": len(loaders),
+        "computed": len(computed),
+        "already_warm": len(loaders) - len(computed),
+        "rows_fetched": int(spans.loc[spans["span"] == "extract", "rows"].sum()) if "rows" in spans else 0,
+        "wall_seconds": round(float((spans["start_seconds"] + spans["wall_seconds"]).max()), 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync the event store and precompute the dashboard's default views.")
+    parser.add_argument("--secrets", default=".streamlit/secrets.toml", help="the dashboard's settings file")
+    parser.add_argument("--start-date", default=sections.DEFAULT_START_DATE)
+    parser.add_argument("--end-date", default=sections.DEFAULT_END_DATE)
+    parser.add_argument("--timeframe", action="append", choices=sections.TIMEFRAMES, help="repeatable; default all")
+    parser.add_argument("--refresh", action="store_true", help="recompute entries that are still fresh")
+    parser.add_argument("--json", help="also write the per-section report to this file")
+    args = parser.parse_args(argv)
+
+    settings = load_settings(args.secrets)
+    if settings.get("perf", {}).get("json_logs", True):
+        perf.configure_logging()
+    spans = warm(settings, args.start_date, args.end_date, args.timeframe or sections.TIMEFRAMES, refresh=args.refresh)
+
+    columns = [name for name in ("kind", "span", "timeframe", "cache", "rows", "wall_seconds") if name in spans]
+    table = spans[columns].astype({"rows": "Int64"} if "rows" in spans else {}).astype(object)
+    print(table.where(table.notna(), "").to_string(index=False))
+    summary = summarize(spans)
+    print(f"computed {summary['computed']} of {summary['sections']} sections "
+          f"({summary['already_warm']} already warm) in {summary['wall_seconds']:.1f}s")
+    if args.json:
+        report = {"summary": summary, "spans": spans.to_dict(orient="records")}
+        Path(args.json).write_text(json.dumps(report, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
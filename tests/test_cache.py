@@ -0,0 +1,97 @@
+import types
+
+import pandas as pd
+
+from squid_metrics import cache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+def _cache(tmp_path, monkeypatch, **settings):
+    clock = _Clock()
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(time=clock.time))
+    return cache.LocalResultCache(tmp_path, **settings), clock
+
+
+def _frame(seed, rows=200):
+    values = [seed * rows + index for index in range(rows)]
+    return pd.DataFrame({"day": pd.date_range("2025-01-01", periods=rows), "value": values})
+
+
+def _cached(result_cache, family, entry):
+    # checks the payload file rather than calling _get, which would count as a read
+    return (result_cache.root / "values" / f"{result_cache.key(family, {'entry': entry})}-0.parquet").exists()
+
+
+def test_entries_expire_after_their_family_ttl(tmp_path, monkeypatch):
+    result_cache, clock = _cache(tmp_path, monkeypatch, ttls={"kpis": 60})
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return _frame(len(computed))
+
+    stats = {}
+    first = result_cache.get_or_compute("kpis", {"window": 1}, compute, stats)
+    assert stats["cache"] == "miss"
+    clock.now += 59
+    assert result_cache.get_or_compute("kpis", {"window": 1}, compute, stats).equals(first)
+    assert stats["cache"] == "hit"
+
+    clock.now += 2
+    assert not result_cache.get_or_compute("kpis", {"window": 1}, compute, stats).equals(first)
+    assert stats["cache"] == "miss"
+    assert len(computed) == 2
+
+
+def test_tuple_results_round_trip(tmp_path, monkeypatch):
+    result_cache, _ = _cache(tmp_path, monkeypatch)
+    value = (_frame(1), _frame(2, rows=3))
+    result_cache.get_or_compute("paths", {}, lambda: value)
+    cached = result_cache.get_or_compute("paths", {}, lambda: None)
+    assert isinstance(cached, tuple)
+    assert all(left.equals(right) for left, right in zip(cached, value))
+
+
+def test_eviction_drops_expired_entries_then_least_recently_read(tmp_path, monkeypatch):
+    result_cache, clock = _cache(tmp_path, monkeypatch, ttls={"kpis": 3600, "paths": 10})
+    result_cache.get_or_compute("kpis", {"entry": "a"}, lambda: _frame(1))
+    entry_size = result_cache.size()
+    result_cache.max_bytes = int(entry_size * 3.5)
+
+    clock.now += 1
+    result_cache.get_or_compute("kpis", {"entry": "b"}, lambda: _frame(2))
+    clock.now += 1
+    result_cache.get_or_compute("paths", {"entry": "c"}, lambda: _frame(3))
+    clock.now += 1
+    # reading a makes b the least recently read entry
+    result_cache.get_or_compute("kpis", {"entry": "a"}, lambda: None)
+
+    # c has expired by the time d goes over the limit, so it goes before b even though b was read longer ago
+    clock.now += 20
+    result_cache.get_or_compute("kpis", {"entry": "d"}, lambda: _frame(4))
+    assert not _cached(result_cache, "paths", "c")
+    assert all(_cached(result_cache, "kpis", entry) for entry in "abd")
+
+    # with nothing expired, e going over the limit evicts the least recently read entry
+    clock.now += 1
+    result_cache.get_or_compute("kpis", {"entry": "e"}, lambda: _frame(5))
+    assert not _cached(result_cache, "kpis", "b")
+    assert all(_cached(result_cache, "kpis", entry) for entry in "ade")
+    assert result_cache.size() <= result_cache.max_bytes
+    assert result_cache.stats()["evictions"] == 2
+    assert sorted(path.name.split("-")[0] for path in (tmp_path / "values").iterdir()) == ["kpis"] * 3
+
+
+def test_open_result_cache_reads_settings(tmp_path):
+    result_cache = cache.open_result_cache({"root": str(tmp_path), "max_megabytes": 2, "ttl_minutes": {"kpis": 5}})
+    assert isinstance(result_cache, cache.LocalResultCache)
+    assert result_cache.max_bytes == 2 * 2**20
+    assert result_cache.ttl("kpis") == 300
+    assert result_cache.ttl("paths") == cache.DEFAULT_TTLS["paths"]
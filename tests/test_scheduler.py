@@ -0,0 +1,42 @@
+import threading
+import time
+
+import pytest
+
+from squid_metrics import cancellation, scheduler
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached before the deadline"
+        time.sleep(0.01)
+
+
+def test_cancelled_queued_task_is_dropped_rather_than_expired():
+    query_scheduler = scheduler.QueryScheduler(max_workers=1, queue_timeout=0.5)
+    release = threading.Event()
+    try:
+        busy = query_scheduler.submit(release.wait)
+        _wait_for(lambda: query_scheduler.stats()["running"] == 1)
+        group = cancellation.QueryGroup("superseded")
+        queued = query_scheduler.submit(lambda: "never runs")
+        group.add_future(queued)
+        assert group.cancel() == (0, 0.0, 1)
+
+        # the reaper must neither crash on the cancelled future nor count it as timed out, and still expire live work
+        waiting = query_scheduler.submit(lambda: "ran")
+        with pytest.raises(scheduler.AdmissionError):
+            waiting.result(timeout=5)
+        stats = query_scheduler.stats()
+        assert stats["timed_out"] == 1
+        assert stats["queued"] == 0
+
+        release.set()
+        assert busy.result(timeout=5) is True
+        assert query_scheduler.submit(lambda: "ran").result(timeout=5) == "ran"
+        assert queued.cancelled()
+        assert all(worker.is_alive() for worker in query_scheduler._workers)
+    finally:
+        release.set()
+        query_scheduler.shutdown()
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from squid_metrics import sketches
+
+PRECISION = 12
+TRIALS = 16
+
+
+def _events(users):
+    return pd.DataFrame({
+        "created_at": pd.Timestamp("2025-01-01"),
+        "source_chain": "ethereum",
+        "destination_chain": "base",
+        "user": users,
+    })
+
+
+def test_hll_error_stays_within_standard_error_across_small_range_switch():
+    # 1m to 6m distinct users covers the old linear-counting switch at 2.5m, where the raw estimate was biased
+    m = 1 << PRECISION
+    bound = sketches.relative_error(PRECISION)
+    for multiple in (1, 1.5, 2, 2.5, 3, 4, 5, 6):
+        n = int(multiple * m)
+        errors = []
+        for trial in range(TRIALS):
+            users = pd.Series([f"0x{trial:04x}{index:036x}" for index in range(n)])
+            counter = sketches.UserCounter(sketches.build_hll(_events(users), PRECISION), precision=PRECISION)
+            errors.append(counter.count() / n - 1)
+        errors = np.array(errors)
+        assert abs(errors.mean()) < bound, f"{n} users: bias {errors.mean():+.4f}"
+        assert np.sqrt((errors ** 2).mean()) < 1.5 * bound, f"{n} users: rms error {np.sqrt((errors ** 2).mean()):.4f}"
+
+
+def test_hll_counts_per_group():
+    users = pd.Series([f"u{index}" for index in range(3000)])
+    events = _events(users)
+    events.loc[:999, "source_chain"] = "arbitrum"
+    counter = sketches.UserCounter(sketches.build_hll(events, PRECISION), precision=PRECISION)
+    counts = counter.count(lambda table: table["source_chain"])
+    assert set(counts.index) == {"arbitrum", "ethereum"}
+    assert abs(counts["arbitrum"] / 1000 - 1) < 3 * sketches.relative_error(PRECISION)
+    assert abs(counts["ethereum"] / 2000 - 1) < 3 * sketches.relative_error(PRECISION)
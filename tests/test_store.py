@@ -0,0 +1,124 @@
+import pandas as pd
+
+from squid_metrics import events, store
+
+
+def _day_events(day, users, source_chain="ethereum", amount_usd=10.0):
+    day = pd.Timestamp(day)
+    return events.normalize_events(pd.DataFrame({
+        "created_at": [day + pd.Timedelta(hours=hour % 24) for hour in range(len(users))],
+        "source_chain": source_chain,
+        "destination_chain": "base",
+        "user": users,
+        "amount_usd": amount_usd,
+        "fee": 0.1,
+        "id": [f"{day:%Y%m%d}-{user}-{source_chain}" for user in users],
+        "service": "GMP",
+        "asset": "USDC",
+    }))
+
+
+class _Source:
+    # serves whole days from a day -> events mapping and records each requested range
+    def __init__(self, days):
+        self.days = {pd.Timestamp(day): df for day, df in days.items()}
+        self.calls = []
+
+    def __call__(self, since, until):
+        self.calls.append((since, until))
+        frames = [df for day, df in self.days.items() if since <= day <= until]
+        return pd.concat(frames, ignore_index=True) if frames else _day_events(since, [])
+
+
+def _amounts_by_day(event_store, start_date, end_date):
+    stored = event_store.read(start_date, end_date)
+    return stored.groupby(stored["created_at"].dt.normalize())["amount_usd"].sum().to_dict()
+
+
+def _same_rows(left, right):
+    left = left.astype({column: str for column in left.select_dtypes("category")})
+    right = right.astype(left.dtypes.to_dict())
+    columns = list(left.columns)
+    return left.sort_values(columns).reset_index(drop=True).equals(right.sort_values(columns).reset_index(drop=True))
+
+
+def _assert_derived_match_rebuild(event_store, start_date, end_date):
+    history = event_store.read(start_date, end_date)
+    for name, (_, build) in event_store._derived.items():
+        assert _same_rows(event_store.read_derived(name), build(history)), name
+
+
+def test_sync_replaces_only_the_refetched_days(tmp_path):
+    event_store = store.EventStore(tmp_path, history_start="2025-01-01", refetch_days=1)
+    source = _Source({f"2025-01-0{day}": _day_events(f"2025-01-0{day}", ["a", "b"]) for day in range(1, 5)})
+    event_store.sync(source, "2025-01-04")
+    assert event_store.watermark().normalize() == pd.Timestamp("2025-01-04")
+
+    # late rows land on the watermark's day and the day before; an earlier day changed upstream is not refetched
+    source.days[pd.Timestamp("2025-01-01")] = _day_events("2025-01-01", ["a", "b"], amount_usd=99.0)
+    source.days[pd.Timestamp("2025-01-03")] = _day_events("2025-01-03", ["a", "b", "c"])
+    source.days[pd.Timestamp("2025-01-05")] = _day_events("2025-01-05", ["d"])
+    event_store.sync(source, "2025-01-05")
+
+    assert source.calls[-1] == (pd.Timestamp("2025-01-03"), pd.Timestamp("2025-01-05"))
+    assert _amounts_by_day(event_store, "2025-01-01", "2025-01-05") == {
+        pd.Timestamp("2025-01-01"): 20.0,
+        pd.Timestamp("2025-01-02"): 20.0,
+        pd.Timestamp("2025-01-03"): 30.0,
+        pd.Timestamp("2025-01-04"): 20.0,
+        pd.Timestamp("2025-01-05"): 10.0,
+    }
+    _assert_derived_match_rebuild(event_store, "2025-01-01", "2025-01-05")
+
+
+def test_sync_drops_days_that_came_back_empty(tmp_path):
+    event_store = store.EventStore(tmp_path, history_start="2025-01-01", refetch_days=1)
+    source = _Source({"2025-01-01": _day_events("2025-01-01", ["a"]), "2025-01-02": _day_events("2025-01-02", ["b"])})
+    event_store.sync(source, "2025-01-02")
+
+    del source.days[pd.Timestamp("2025-01-02")]
+    event_store.sync(source, "2025-01-02")
+
+    assert list(_amounts_by_day(event_store, "2025-01-01", "2025-01-02")) == [pd.Timestamp("2025-01-01")]
+    _assert_derived_match_rebuild(event_store, "2025-01-01", "2025-01-02")
+
+
+def test_extend_backfills_only_the_missing_leading_days(tmp_path):
+    event_store = store.EventStore(tmp_path, history_start="2025-01-03", refetch_days=1)
+    source = _Source({f"2025-01-0{day}": _day_events(f"2025-01-0{day}", ["a", f"u{day}"]) for day in range(1, 5)})
+    event_store.sync(source, "2025-01-04")
+    watermark = event_store.watermark()
+
+    assert event_store.extend("2025-01-01", source) == pd.Timestamp("2025-01-01")
+    assert source.calls[-1] == (pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-02"))
+    assert event_store.covered_start() == pd.Timestamp("2025-01-01")
+    assert event_store.watermark() == watermark
+    assert len(_amounts_by_day(event_store, "2025-01-01", "2025-01-04")) == 4
+    _assert_derived_match_rebuild(event_store, "2025-01-01", "2025-01-04")
+
+    # a start inside the covered span fetches nothing
+    calls = len(source.calls)
+    assert event_store.extend("2025-01-02", source) == pd.Timestamp("2025-01-01")
+    assert len(source.calls) == calls
+
+
+def test_exact_user_counts_match_nunique_over_the_window(tmp_path):
+    event_store = store.EventStore(tmp_path, history_start="2025-01-01", refetch_days=1)
+    days = {}
+    for day in range(1, 8):
+        users = [f"0x{(day * 7 + index) % 23:040x}" for index in range(12)]
+        days[f"2025-01-0{day}"] = pd.concat([
+            _day_events(f"2025-01-0{day}", users[:8], source_chain="ethereum"),
+            _day_events(f"2025-01-0{day}", users[5:], source_chain="arbitrum"),
+        ], ignore_index=True)
+    event_store.sync(_Source(days), "2025-01-07")
+    counter = event_store.user_counter(exact=True)
+
+    windows = [("2025-01-01", "2025-01-07"), ("2025-01-02", "2025-01-04"), ("2025-01-06", "2025-01-06")]
+    for start_date, end_date in windows:
+        stored = event_store.read(start_date, end_date)
+        window = counter.window(start_date, end_date)
+        assert window.count() == stored["user"].nunique()
+        by_chain = window.count(lambda table: table["source_chain"])
+        expected = stored.groupby("source_chain", observed=True)["user"].nunique()
+        assert by_chain.astype(int).to_dict() == expected.to_dict()